@@ -1,110 +1,812 @@
 import argparse
+import ast
+import collections
+import contextlib
+import cProfile
+import functools
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import math
+import os
+import pickle
+import re
+import shlex
+import shutil
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-def load_data(file_path):
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = feather = ipc = pq = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CACHE_DIR = os.environ.get('CSVTOOL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'csvtool'))
+CACHE_LIMIT_MB = 2048
+# Set by serve: parsed datasets kept in memory between requests.
+REGISTRY = None
+
+def load_data(file_path, use_cache=False, cache_limit_mb=CACHE_LIMIT_MB, schema=None):
+    with PROFILER.stage('load'):
+        if REGISTRY is not None:
+            data = REGISTRY.get(file_path, use_cache, cache_limit_mb, schema)
+        else:
+            data = _load_data(file_path, use_cache, cache_limit_mb, schema)
+    if data is not None:
+        PROFILER.add_rows('load', len(data))
+    return data
+
+def _load_data(file_path, use_cache, cache_limit_mb, schema):
     try:
-        data = pd.read_csv(file_path)
+        options = reader_options(schema)
+        if is_columnar(file_path):
+            # Already typed and columnar: read it directly rather than through the cache.
+            return read_columnar(file_path, options.get('usecols'))
+        if use_cache:
+            data = read_cache(file_path, schema)
+            if data is not None:
+                return data
+        try:
+            data = narrow_dtypes(pd.read_csv(file_path, **options), schema)
+        except (ValueError, OverflowError) as e:
+            if not options:
+                raise
+            # A value outside the sampled rows did not fit the schema; fall back to default inference.
+            print(f"Warning: schema did not fit the whole file ({e}); reading with default dtypes.")
+            data = pd.read_csv(file_path, usecols=options.get('usecols'))
+            schema = None
+        if use_cache:
+            write_cache(file_path, data, cache_limit_mb, schema)
         return data
     except Exception as e:
         print(f"Error loading file: {e}")
         return None
 
-def handle_missing_data(data, action, fill_value="Unknown"):
-    data = data.copy()
+def _narrowest_int(low, high, headroom=16):
+    # Leave room for values beyond the sample (e.g. growing IDs) before picking a width. The nullable
+    # dtypes keep a missing value after the sample from failing the read partway through.
+    bound = max(abs(int(low)), abs(int(high)), 1) * headroom
+    for dtype in ('int8', 'int16', 'int32'):
+        if bound <= np.iinfo(dtype).max:
+            return dtype.capitalize()
+    return 'Int64'
+
+def _narrowest_float(text, numbers):
+    # float32 keeps 6 significant digits exactly, so it only replaces float64 when no sampled value has more.
+    mantissa = text.str.strip().str.lower().str.split('e').str[0].str.lstrip('+-')
+    digits = mantissa.str.replace('.', '', regex=False).str.strip('0').str.len()
+    finite = numbers[np.isfinite(numbers)]
+    if digits.max() <= 6 and (finite.abs() < np.finfo('float32').max / 16).all():
+        return 'float32'
+    return 'float64'
+
+def infer_schema(file_path, sample_rows=10000, max_categories=1000, category_ratio=0.5, bad_ratio=0.01):
+    sample = pd.read_csv(file_path, nrows=sample_rows, dtype=str)
+    schema = {'columns': list(sample.columns), 'usecols': list(sample.columns),
+              'dtype': {}, 'parse_dates': [], 'na_values': {}}
+    for column in sample.columns:
+        text = sample[column].dropna()
+        if text.empty:
+            continue
+        numbers = pd.to_numeric(text, errors='coerce')
+        bad = text[numbers.isna()]
+        if len(bad) < len(text) and len(bad) <= bad_ratio * len(text):
+            # Mostly numeric: treat the odd unparseable tokens as missing instead of falling back to object.
+            if len(bad):
+                schema['na_values'][column] = sorted(bad.unique())
+            numbers = numbers.dropna()
+            if (numbers % 1 == 0).all():
+                schema['dtype'][column] = _narrowest_int(numbers.min(), numbers.max())
+            else:
+                schema['dtype'][column] = _narrowest_float(text[numbers.index], numbers)
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            dates = pd.to_datetime(text, errors='coerce')
+        if dates.notna().all():
+            schema['parse_dates'].append(column)
+        elif text.nunique() <= max_categories and text.nunique() <= category_ratio * len(text):
+            schema['dtype'][column] = 'category'
+    return schema
+
+def load_schema(schema_file):
+    with open(schema_file) as handle:
+        return json.load(handle)
+
+def save_schema(schema, schema_file):
+    with open(schema_file, 'w') as handle:
+        json.dump(schema, handle, indent=2)
+    print(f"Schema saved to {schema_file}")
+
+# The CSV reader wraps values that overflow a narrow numeric dtype without an error, so these columns
+# are parsed at full width and narrowed afterwards by narrow_dtypes.
+WIDE_DTYPES = {'Int8': 'Int64', 'Int16': 'Int64', 'Int32': 'Int64', 'float32': 'float64'}
+
+def reader_options(schema):
+    if not schema:
+        return {}
+    usecols = schema.get('usecols')
+    options = {'dtype': {column: WIDE_DTYPES.get(dtype, dtype) for column, dtype in schema.get('dtype', {}).items()
+                         if usecols is None or column in usecols}}
+    if usecols is not None and usecols != schema.get('columns'):
+        options['usecols'] = usecols
+    if schema.get('parse_dates'):
+        options['parse_dates'] = [column for column in schema['parse_dates'] if usecols is None or column in usecols]
+    if schema.get('na_values'):
+        options['na_values'] = schema['na_values']
+    return options
+
+def narrow_dtypes(data, schema):
+    # A column whose values do not all fit its schema dtype keeps the full width instead of wrapping.
+    for column, dtype in (schema or {}).get('dtype', {}).items():
+        if dtype in WIDE_DTYPES and column in data.columns:
+            values = data[column].dropna()
+            info = np.finfo(dtype) if dtype == 'float32' else np.iinfo(dtype.lower())
+            if values.empty or (values.min() >= info.min and values.max() <= info.max):
+                data[column] = data[column].astype(dtype)
+    return data
+
+def content_hash(file_path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_key(file_path, options=None):
+    source = os.path.abspath(file_path)
+    text = json.dumps([source, options or {}], sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def _read_cache_index():
+    try:
+        with open(os.path.join(CACHE_DIR, 'index.json')) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w') as handle:
+        json.dump(index, handle, indent=1)
+    os.replace(temp_path, os.path.join(CACHE_DIR, 'index.json'))
+
+def _remove_cache_entry(index, key):
+    entry = index.pop(key)
+    try:
+        os.remove(os.path.join(CACHE_DIR, entry['file']))
+    except FileNotFoundError:
+        pass
+
+def _fingerprint_matches(file_path, entry):
+    stat = os.stat(file_path)
+    if entry['size'] != stat.st_size:
+        return False
+    if entry['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    # Touched but maybe unchanged: only now pay for a full content hash.
+    if content_hash(file_path) != entry['content_hash']:
+        return False
+    entry['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+def read_cache(file_path, options=None):
+    index = _read_cache_index()
+    key = _cache_key(file_path, options)
+    entry = index.get(key)
+    if entry is None:
+        return None
+    if not _fingerprint_matches(file_path, entry):
+        _remove_cache_entry(index, key)
+        _write_cache_index(index)
+        return None
+    cache_file = os.path.join(CACHE_DIR, entry['file'])
+    try:
+        if entry['format'] == 'feather':
+            data = feather.read_table(cache_file, memory_map=True).to_pandas()
+        else:
+            data = pd.read_pickle(cache_file)
+    except Exception:
+        _remove_cache_entry(index, key)
+        _write_cache_index(index)
+        return None
+    entry['last_used'] = time.time()
+    _write_cache_index(index)
+    return data
+
+def write_cache(file_path, data, limit_mb=CACHE_LIMIT_MB, options=None):
+    # A frame that could not fit even in an empty cache is not worth writing out and hashing on every run.
+    if data.memory_usage(index=True, deep=True).sum() > limit_mb * 1024 * 1024:
+        return
+    key = _cache_key(file_path, options)
+    stat = os.stat(file_path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_format = 'feather' if feather is not None else 'pickle'
+    cache_file = os.path.join(CACHE_DIR, f"{key}.{cache_format}")
+    try:
+        if cache_format == 'feather':
+            feather.write_feather(data, cache_file, compression='uncompressed')
+        else:
+            data.to_pickle(cache_file)
+    except Exception as e:
+        # Some frames (e.g. mixed-type object columns) have no columnar form; just skip caching them.
+        print(f"Warning: could not cache {file_path}: {e}")
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        return
+    index = _read_cache_index()
+    index[key] = {'source': os.path.abspath(file_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                  'content_hash': content_hash(file_path), 'options': options or {},
+                  'file': os.path.basename(cache_file), 'format': cache_format,
+                  'bytes': os.path.getsize(cache_file), 'last_used': time.time()}
+    total = sum(entry['bytes'] for entry in index.values())
+    for old_key in sorted(index, key=lambda k: index[k]['last_used']):
+        if total <= limit_mb * 1024 * 1024 or old_key == key:
+            break
+        total -= index[old_key]['bytes']
+        _remove_cache_entry(index, old_key)
+    if total > limit_mb * 1024 * 1024:
+        _remove_cache_entry(index, key)
+    _write_cache_index(index)
+
+def clear_cache(file_path=None):
+    index = _read_cache_index()
+    source = os.path.abspath(file_path) if file_path else None
+    removed = [key for key, entry in index.items() if source is None or entry['source'] == source]
+    for key in removed:
+        _remove_cache_entry(index, key)
+    _write_cache_index(index)
+    return len(removed)
+
+OUTPUT_FORMATS = ('csv', 'csv.gz', 'csv.zst', 'parquet', 'feather')
+FORMAT_SUFFIXES = (('.parquet', 'parquet'), ('.pq', 'parquet'), ('.feather', 'feather'), ('.arrow', 'feather'),
+                   ('.ipc', 'feather'), ('.gz', 'csv.gz'), ('.zst', 'csv.zst'))
+WRITE_CHUNK_ROWS = 500_000
+COMPRESS_BLOCK_CHARS = 4 << 20
+
+def file_format(file_path, fmt=None):
+    if fmt:
+        return fmt
+    name = str(file_path).lower()
+    return next((found for suffix, found in FORMAT_SUFFIXES if name.endswith(suffix)), 'csv')
+
+def is_columnar(file_path):
+    return file_format(file_path) in ('parquet', 'feather')
+
+def _require_pyarrow(fmt):
+    if pa is None:
+        raise ValueError(f"pyarrow is required for {fmt} files (pip install pyarrow)")
+
+def read_columnar(file_path, usecols=None):
+    _require_pyarrow(file_format(file_path))
+    if file_format(file_path) == 'parquet':
+        return pq.read_table(file_path, columns=usecols).to_pandas()
+    return feather.read_table(file_path, columns=usecols, memory_map=True).to_pandas()
+
+def read_columnar_chunks(file_path, chunksize, usecols=None):
+    _require_pyarrow(file_format(file_path))
+    if file_format(file_path) == 'parquet':
+        batches = pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=usecols)
+    else:
+        reader = ipc.open_file(pa.memory_map(file_path))
+        batches = (reader.get_batch(i).select(usecols) if usecols else reader.get_batch(i)
+                   for i in range(reader.num_record_batches))
+
+    def chunks():
+        # Numbered on from the previous chunk, as read_csv chunks are.
+        row = 0
+        for batch in batches:
+            for start in range(0, batch.num_rows, chunksize):
+                chunk = batch.slice(start, chunksize).to_pandas()
+                chunk.index = pd.RangeIndex(row, row + len(chunk))
+                row += len(chunk)
+                yield chunk
+    return chunks()
+
+def columnar_columns(file_path):
+    _require_pyarrow(file_format(file_path))
+    if file_format(file_path) == 'parquet':
+        return list(pq.read_schema(file_path).names)
+    return list(ipc.open_file(pa.memory_map(file_path)).schema.names)
+
+class GzipBlockWriter:
+    # Text is cut into blocks that a thread pool compresses (zlib releases the GIL); each block is a
+    # complete gzip member and members are written in order, which gzip readers treat as one stream.
+    def __init__(self, raw, workers=None, level=3):
+        self.raw = raw
+        self.level = level
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(self.workers)
+        self.pending = collections.deque()
+        self.buffer = []
+        self.size = 0
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= COMPRESS_BLOCK_CHARS:
+            self._submit()
+        return len(text)
+
+    def _submit(self):
+        block = ''.join(self.buffer).encode()
+        self.buffer, self.size = [], 0
+        self.pending.append(self.pool.submit(gzip.compress, block, self.level, mtime=0))
+        while len(self.pending) > 2 * self.workers:
+            self.raw.write(self.pending.popleft().result())
+
+    def close(self):
+        try:
+            if self.buffer:
+                self._submit()
+            while self.pending:
+                self.raw.write(self.pending.popleft().result())
+        finally:
+            self.pool.shutdown()
+
+class ZstdWriter:
+    # zstd compresses on its own worker threads; the output is a single frame.
+    def __init__(self, raw, level=3):
+        if zstandard is None:
+            raise ValueError("zstandard is required for .zst files (pip install zstandard)")
+        self.stream = zstandard.ZstdCompressor(level=level, threads=-1).stream_writer(raw, closefd=False)
+
+    def write(self, text):
+        self.stream.write(text.encode())
+        return len(text)
+
+    def close(self):
+        self.stream.close()
+
+class FrameWriter:
+    # Appends DataFrames to a Parquet file (one row group each) or a Feather/Arrow IPC file (one record
+    # batch each); the first frame fixes the schema.
+    def __init__(self, file_path, fmt):
+        _require_pyarrow(fmt)
+        self.file_path = file_path
+        self.fmt = fmt
+        self.schema = None
+        self.writer = None
+
+    def write_frame(self, frame):
+        try:
+            table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Object columns mixing numbers and text (e.g. a text fill of a numeric column) are stored as text.
+            frame = frame.copy()
+            for column in frame.columns[frame.dtypes == object]:
+                values = frame[column]
+                frame[column] = values.where(values.isna(), values.astype(str))
+            try:
+                table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError) as e:
+                raise ValueError(f"column types changed between chunks ({e}); give them fixed dtypes with --schema")
+        if self.writer is None:
+            self.schema = table.schema
+            if self.fmt == 'parquet':
+                self.writer = pq.ParquetWriter(self.file_path, self.schema)
+            else:
+                self.writer = ipc.new_file(self.file_path, self.schema,
+                                           options=ipc.IpcWriteOptions(compression='lz4', use_threads=True))
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def frame_slices(data, rows=WRITE_CHUNK_ROWS):
+    if len(data) == 0:
+        yield data
+    for start in range(0, len(data), rows):
+        yield data.iloc[start:start + rows]
+
+def read_output_chunks(file_path, chunksize=100000):
+    if is_columnar(file_path):
+        return read_columnar_chunks(file_path, chunksize)
+    return pd.read_csv(file_path, chunksize=chunksize)
+
+def copy_output(source_file, handle):
+    # Plain CSV to a text handle is copied as is; anything else is re-read and re-encoded.
+    if file_format(source_file) == 'csv' and not isinstance(handle, FrameWriter):
+        copy_text(source_file, handle)
+        return None
+    return write_chunks(read_output_chunks(source_file), handle)
+
+def load_chunks(file_path, chunksize, schema=None):
+    try:
+        if is_columnar(file_path):
+            chunks = read_columnar_chunks(file_path, chunksize, reader_options(schema).get('usecols'))
+        else:
+            chunks = (narrow_dtypes(chunk, schema)
+                      for chunk in pd.read_csv(file_path, chunksize=chunksize, **reader_options(schema)))
+        return PROFILER.iterate('load', chunks)
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return None
+
+def read_columns(file_path, schema=None):
+    try:
+        usecols = reader_options(schema).get('usecols')
+        if is_columnar(file_path):
+            return [column for column in columnar_columns(file_path) if usecols is None or column in usecols]
+        return list(pd.read_csv(file_path, nrows=0, usecols=usecols).columns)
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return None
+
+def handle_missing_data(data, action, fill_value="Unknown", means=None, copy=True):
+    if copy:
+        data = data.copy()
     if action == "drop":
         return data.dropna()
     elif action == "fill":
         if fill_value == "mean":
-            for column in data.select_dtypes(include=['float64', 'int64']):
-                mean_value = data[column].mean()
+            columns = data.select_dtypes(include='number').columns if means is None else means.keys()
+            for column in columns:
+                if column not in data.columns:
+                    continue
+                mean_value = data[column].mean() if means is None else means[column]
                 if pd.notna(mean_value):
-                    data[column] = data[column].fillna(mean_value)
+                    series = data[column]
+                    if pd.api.types.is_integer_dtype(series) and series.isna().any() and mean_value % 1:
+                        # A nullable integer column (from --infer-schema) cannot hold a fractional mean.
+                        series = series.astype('Float64')
+                    data[column] = series.fillna(mean_value)
         else:
-            data.fillna(fill_value, inplace=True)
+            for column in data.columns[data.isna().any()]:
+                series = data[column]
+                if isinstance(series.dtype, pd.CategoricalDtype) and fill_value not in series.cat.categories:
+                    series = series.cat.add_categories([fill_value])
+                try:
+                    data[column] = series.fillna(fill_value)
+                except TypeError:
+                    # Newer pandas refuses to upcast e.g. a float column to hold a text fill value.
+                    data[column] = series.astype(object).fillna(fill_value)
         return data
     else:
         print("Invalid action for missing data. Use 'drop' or 'fill'.")
         return data
 
-def remove_duplicates(data, column):
-    if column not in data.columns:
-        print(f"Error: Column '{column}' not found in dataset.")
+def remove_duplicates(data, column, keep='first'):
+    columns = [column] if isinstance(column, str) else list(column)
+    missing = [column for column in columns if column not in data.columns]
+    if missing:
+        print(f"Error: Column '{missing[0]}' not found in dataset.")
         return data
-    return data.drop_duplicates(subset=[column])
+    return data.drop_duplicates(subset=columns, keep=keep)
 
 def summary_statistics(data):
     print("Summary Statistics:\n", data.describe())
 
-def plot_histogram(data, column):
+PLOT_BINS = 20
+KDE_SAMPLE_SIZE = 20000
+KDE_POINTS = 200
+MAX_CATEGORIES = 20
+
+def plotting(backend=None):
+    # matplotlib and seaborn take longer to import than pandas; only commands that draw pay for them.
+    import matplotlib
+    if backend:
+        matplotlib.use(backend)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+def line_budget(figsize=(8, 5)):
+    # One point per horizontal pixel of the figure is all a line plot can show.
+    plt, _ = plotting()
+    return int(figsize[0] * plt.rcParams['figure.dpi'])
+
+def column_range(chunks, column):
+    low, high = np.inf, -np.inf
+    for chunk in chunks:
+        values = pd.to_numeric(chunk[column], errors='coerce')
+        if values.notna().any():
+            low, high = min(low, values.min()), max(high, values.max())
+    return (low, high) if low <= high else None
+
+def histogram_edges(value_range, bins=PLOT_BINS):
+    low, high = value_range
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+class HistogramStats:
+    # Counts over fixed edges add up across chunks; the KDE sample keeps the values with the smallest
+    # random keys, which is a uniform sample of everything seen and merges the same way.
+    def __init__(self, column, edges, sample_size=KDE_SAMPLE_SIZE, seed=0):
+        self.column = column
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.sample_size = sample_size
+        self.sample = np.empty(0)
+        self.sample_keys = np.empty(0)
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        values = pd.to_numeric(chunk[self.column], errors='coerce').dropna().to_numpy(dtype=float)
+        self.counts += np.histogram(values, self.edges)[0]
+        self._keep(values, self.rng.random(len(values)))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self._keep(other.sample, other.sample_keys)
+
+    def _keep(self, values, keys):
+        values = np.concatenate([self.sample, values])
+        keys = np.concatenate([self.sample_keys, keys])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            values, keys = values[keep], keys[keep]
+        self.sample, self.sample_keys = values, keys
+
+    def kde(self, points=KDE_POINTS):
+        # Gaussian KDE with Scott's bandwidth, scaled to the histogram's counts like seaborn's kde=True.
+        if len(self.sample) < 2 or self.sample.std() == 0:
+            return None
+        bandwidth = self.sample.std(ddof=1) * len(self.sample) ** -0.2
+        grid = np.linspace(self.edges[0], self.edges[-1], points)
+        density = np.array([np.exp(-0.5 * ((x - self.sample) / bandwidth) ** 2).sum() for x in grid])
+        density /= len(self.sample) * bandwidth * np.sqrt(2 * np.pi)
+        return grid, density * self.counts.sum() * (self.edges[1] - self.edges[0])
+
+class CategoryCounts:
+    def __init__(self, column):
+        self.column = column
+        self.counts = None
+
+    def update(self, chunk):
+        counts = chunk[self.column].value_counts(sort=False)
+        self.counts = counts if self.counts is None else _merge_counts(self.counts, counts)
+
+    def merge(self, other):
+        if other.counts is not None:
+            self.counts = other.counts if self.counts is None else _merge_counts(self.counts, other.counts)
+
+    def top(self, k=MAX_CATEGORIES):
+        if self.counts is None:
+            return pd.Series(dtype='int64')
+        counts = self.counts.sort_values(ascending=False, kind='stable')
+        if len(counts) <= k:
+            return counts
+        top = counts.iloc[:k - 1]
+        top.index = top.index.astype(object)
+        return pd.concat([top, pd.Series([counts.iloc[k - 1:].sum()], index=['other'])])
+
+def minmax_decimate(x, y, buckets):
+    # Keep the lowest and highest point of each x bucket, so spikes survive the reduction.
+    span = x[-1] - x[0]
+    ids = np.zeros(len(x), dtype=np.int64) if span == 0 else ((x - x[0]) / span * (buckets - 1)).astype(np.int64)
+    grouped = pd.Series(y).groupby(ids)
+    keep = np.union1d(grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy())
+    return x[keep], y[keep]
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: per bucket, keep the point spanning the largest triangle with
+    # the previously kept point and the next bucket's average.
+    if len(x) <= threshold or threshold < 3:
+        return x, y
+    edges = np.linspace(1, len(x) - 1, threshold - 1).astype(np.int64)
+    keep = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else len(x)
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        prev_x, prev_y = x[keep[-1]], y[keep[-1]]
+        area = np.abs((prev_x - next_x) * (y[start:end] - prev_y) - (prev_x - x[start:end]) * (next_y - prev_y))
+        keep.append(start + int(np.argmax(area)))
+    keep.append(len(x) - 1)
+    return x[keep], y[keep]
+
+class LineSeries:
+    # Min-max decimation applied whenever the buffer outgrows a few times the pixel budget, so
+    # memory stays bounded however long the stream is; LTTB trims the result to the budget.
+    def __init__(self, column, budget=None):
+        self.column = column
+        self.budget = budget or line_budget()
+        self.rows = 0
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+
+    def update(self, chunk):
+        values = pd.to_numeric(chunk[self.column], errors='coerce')
+        if pd.api.types.is_numeric_dtype(chunk.index):
+            x = chunk.index.to_numpy(dtype=float)
+        else:
+            x = np.arange(self.rows, self.rows + len(chunk), dtype=float)
+        self.rows += len(chunk)
+        present = values.notna().to_numpy()
+        self._extend(x[present], values.to_numpy(dtype=float)[present])
+
+    def merge(self, other):
+        self.rows += other.rows
+        self._extend(other.x, other.y)
+
+    def _extend(self, x, y):
+        self.x = np.concatenate([self.x, x])
+        self.y = np.concatenate([self.y, y])
+        if len(self.x) > 4 * self.budget:
+            order = np.argsort(self.x, kind='stable')
+            self.x, self.y = minmax_decimate(self.x[order], self.y[order], self.budget)
+
+    def points(self):
+        order = np.argsort(self.x, kind='stable')
+        return lttb(self.x[order], self.y[order], self.budget)
+
+def plot_stats(chunks, visualization, column, value_range=None, sketch=False):
+    if visualization == 'hist' and value_range is not None:
+        stats = HistogramStats(column, histogram_edges(value_range))
+    elif visualization == 'line':
+        stats = LineSeries(column)
+    else:
+        stats = CategorySketch(column) if sketch else CategoryCounts(column)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+def finish_plot(output=None):
+    plt, _ = plotting()
+    with PROFILER.stage('plot'):
+        if output:
+            plt.savefig(output, bbox_inches='tight')
+            plt.close()
+            print(f"Plot saved to {output}")
+        else:
+            plt.show()
+
+def plot_histogram(data, column, output=None, stats=None):
+    plt, sns = plotting()
     if column in data.columns:
+        if stats is None:
+            value_range = column_range([data], column) if pd.api.types.is_numeric_dtype(data[column]) else None
+            stats = plot_stats([data], 'hist', column, value_range)
+        if isinstance(stats, (CategoryCounts, CategorySketch)):
+            plot_bar_chart(data, column, output, stats)
+            return
         plt.figure(figsize=(8, 5))
-        sns.histplot(data[column], bins=20, kde=True)
+        bins = pd.DataFrame({column: stats.edges[:-1], 'count': stats.counts})
+        sns.histplot(data=bins, x=column, weights='count', bins=len(stats.counts),
+                     binrange=(stats.edges[0], stats.edges[-1]))
+        kde = stats.kde()
+        if kde is not None:
+            plt.plot(*kde)
         plt.title(f'Histogram of {column}')
         plt.xlabel(column)
         plt.ylabel('Frequency')
-        plt.show()
+        finish_plot(output)
     else:
         print("Column not found in dataset.")
 
-def plot_pie_chart(data, column):
+def plot_pie_chart(data, column, output=None, stats=None, max_categories=MAX_CATEGORIES):
+    plt, _ = plotting()
     if column in data.columns:
+        stats = stats or plot_stats([data], 'pie', column)
         plt.figure(figsize=(6, 6))
-        data[column].value_counts().plot.pie(autopct='%1.1f%%', startangle=90)
+        stats.top(max_categories).plot.pie(autopct='%1.1f%%', startangle=90)
         plt.title(f'Pie Chart of {column}')
         plt.ylabel('')
-        plt.show()
+        finish_plot(output)
     else:
         print("Column not found in dataset.")
 
-def plot_bar_chart(data, column):
+def plot_bar_chart(data, column, output=None, stats=None, max_categories=MAX_CATEGORIES):
+    plt, sns = plotting()
     if column in data.columns:
+        stats = stats or plot_stats([data], 'bar', column)
+        counts = stats.top(max_categories)
         plt.figure(figsize=(8, 5))
-        sns.countplot(x=data[column])
+        sns.barplot(x=counts.index.astype(str), y=counts.to_numpy())
         plt.title(f'Bar Chart of {column}')
         plt.xlabel(column)
         plt.ylabel('Frequency')
-        plt.show()
+        finish_plot(output)
     else:
         print("Column not found in dataset.")
 
-def plot_line_graph(data, column):
+def plot_line_graph(data, column, output=None, stats=None):
+    plt, sns = plotting()
     if column in data.columns:
         if pd.api.types.is_numeric_dtype(data[column]):
+            x, y = (stats or plot_stats([data], 'line', column)).points()
             plt.figure(figsize=(8, 5))
-            sns.lineplot(data=data, x=data.index, y=column)
+            sns.lineplot(x=x, y=y)
             plt.title(f'Line Graph of {column}')
             plt.xlabel('Index')
             plt.ylabel(column)
-            plt.show()
+            finish_plot(output)
         else:
             print(f"Column {column} is not numeric, cannot plot a line graph.")
     else:
         print("Column not found in dataset.")
 
-def filter_data(data, column, value):
+def _filter_operand(series, value):
+    if isinstance(value, str) and pd.api.types.is_numeric_dtype(series):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    elif isinstance(value, str) and pd.api.types.is_datetime64_any_dtype(series):
+        try:
+            return pd.Timestamp(value)
+        except ValueError:
+            pass
+    return value
+
+def filter_data(data, column, value=None, low=None, high=None):
+    # Equality on value and/or an inclusive [low, high] range.
     if column in data.columns:
-        return data[data[column] == value]
+        series = data[column]
+        mask = pd.Series(True, index=data.index)
+        try:
+            if value is not None:
+                mask &= series == _filter_operand(series, value)
+            if low is not None:
+                mask &= series >= _filter_operand(series, low)
+            if high is not None:
+                mask &= series <= _filter_operand(series, high)
+        except TypeError:
+            print(f"Error: Range bounds cannot be compared with the values of column {column}.")
+            return data.iloc[:0]
+        return data[mask]
     else:
         print("Column not found in dataset.")
         return data
 
-def sort_data(data, column):
-    if column in data.columns:
-        return data.sort_values(by=column)
+def sort_data(data, column, ascending=True, top=None):
+    columns = [column] if isinstance(column, str) else list(column)
+    if all(column in data.columns for column in columns):
+        if top is not None:
+            return top_rows(data, columns, ascending, top)
+        return data.sort_values(by=columns, ascending=ascending, kind='stable', na_position='last')
     else:
         print("Column not found in dataset.")
         return data
 
+def _unsummable(data):
+    return [column for column in data.columns
+            if pd.api.types.is_datetime64_any_dtype(data[column]) or isinstance(data[column].dtype, pd.CategoricalDtype)]
+
 def aggregate_data(data, groupby_column, aggregation_func):
     if groupby_column in data.columns:
         if aggregation_func == "mean":
-            return data.groupby(groupby_column).mean()
+            return data.groupby(groupby_column).mean(numeric_only=True)
         elif aggregation_func == "sum":
-            return data.groupby(groupby_column).sum()
+            skipped = [column for column in _unsummable(data) if column != groupby_column]
+            return data.drop(columns=skipped).groupby(groupby_column).sum()
         elif aggregation_func == "count":
             return data.groupby(groupby_column).count()
+        elif aggregation_func in ("min", "max", "std"):
+            return getattr(data.groupby(groupby_column), aggregation_func)(numeric_only=True)
         else:
             print(f"Unsupported aggregation function: {aggregation_func}")
             return data
@@ -112,7 +814,7 @@ def aggregate_data(data, groupby_column, aggregation_func):
         print("Column not found in dataset.")
         return data
 
-def transform_data(data, new_column, operation, columns):
+def transform_data(data, new_column, operation, columns, zero_division='error', strict=False):
     if len(columns) != 2:
         print("Error: Transformation requires exactly two columns.")
         return data
@@ -123,10 +825,13 @@ def transform_data(data, new_column, operation, columns):
         return data
     
     if operation == "divide":
-        if (data[col2] == 0).any():
+        try:
+            data[new_column] = pd.Series(_divide(np.true_divide, data[col1], data[col2], zero_division), index=data.index)
+        except ZeroDivisionError:
+            if strict:
+                raise ZeroDivisionError(f"Division by zero detected in column {col2}")
             print(f"Error: Division by zero detected in column {col2}.")
             return data
-        data[new_column] = data[col1] / data[col2]
     elif operation == "multiply":
         data[new_column] = data[col1] * data[col2]
     elif operation == "add":
@@ -137,61 +842,2530 @@ def transform_data(data, new_column, operation, columns):
         print(f"Unsupported operation: {operation}")
     return data
 
-def save_data(data, output_file):
-    data.to_csv(output_file, index=False)
+ZERO_DIVISION = ('error', 'nan', 'inf')
+
+EXPRESSION_FUNCTIONS = {'abs': np.abs, 'sqrt': np.sqrt, 'log': np.log, 'log10': np.log10, 'exp': np.exp,
+                        'where': np.where}
+
+_BINARY_OPERATORS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.FloorDiv: '//',
+                     ast.Mod: '%', ast.Pow: '**'}
+_COMPARISONS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='}
+_DIVISIONS = {'/': np.true_divide, '//': np.floor_divide, '%': np.remainder}
+
+def parse_expression(text):
+    # "new = (a - b) / c * 100"; names that are not identifiers go in backticks, as with DataFrame.eval.
+    target, equals, body = text.partition('=')
+    if not equals or not target.strip() or body.startswith('='):
+        raise ValueError("Expression must look like 'new_column = expression'")
+    columns = {}
+
+    def name(match):
+        placeholder = f'__column{len(columns)}'
+        columns[placeholder] = match.group(1)
+        return placeholder
+    source = re.sub(r'`([^`]*)`', name, body.strip())
+    try:
+        tree = ast.parse(source, mode='eval').body
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in EXPRESSION_FUNCTIONS:
+            columns.setdefault(node.id, node.id)
+    _check_expression(tree)
+    return target.strip().strip('`'), tree, columns
+
+def _check_expression(node):
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        _check_expression(node.left)
+        _check_expression(node.right)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+        _check_expression(node.operand)
+    elif isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        for child in [node.left] + node.comparators:
+            _check_expression(child)
+    elif isinstance(node, ast.BoolOp):
+        for child in node.values:
+            _check_expression(child)
+    elif isinstance(node, ast.IfExp):
+        for child in (node.test, node.body, node.orelse):
+            _check_expression(child)
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in EXPRESSION_FUNCTIONS:
+        if node.keywords:
+            raise ValueError(f"{node.func.id}() takes positional arguments only")
+        for child in node.args:
+            _check_expression(child)
+    elif not (isinstance(node, ast.Name) or (isinstance(node, ast.Constant)
+                                             and isinstance(node.value, (int, float, str, bool)))):
+        raise ValueError(f"Unsupported syntax in expression: {ast.unparse(node)}")
+
+def expression_columns(text):
+    return list(parse_expression(text)[2].values())
+
+def _numexpr_source(node, divides):
+    # Same tree as numexpr source text; None when a node (strings, //, %) is outside what numexpr handles.
+    if isinstance(node, ast.BinOp):
+        op = _BINARY_OPERATORS[type(node.op)]
+        if op in ('//', '%') or (op == '/' and not divides):
+            return None
+        left, right = _numexpr_source(node.left, divides), _numexpr_source(node.right, divides)
+        return None if left is None or right is None else f'({left} {op} {right})'
+    if isinstance(node, ast.UnaryOp):
+        operand = _numexpr_source(node.operand, divides)
+        op = '~' if isinstance(node.op, ast.Not) else '-' if isinstance(node.op, ast.USub) else '+'
+        return None if operand is None else f'({op}{operand})'
+    if isinstance(node, ast.Compare):
+        parts = [_numexpr_source(child, divides) for child in [node.left] + node.comparators]
+        if None in parts:
+            return None
+        return '(' + ' & '.join(f'({parts[i]} {_COMPARISONS[type(op)]} {parts[i + 1]})'
+                                for i, op in enumerate(node.ops)) + ')'
+    if isinstance(node, ast.BoolOp):
+        parts = [_numexpr_source(child, divides) for child in node.values]
+        joiner = ' & ' if isinstance(node.op, ast.And) else ' | '
+        return None if None in parts else '(' + joiner.join(parts) + ')'
+    if isinstance(node, ast.IfExp):
+        parts = [_numexpr_source(child, divides) for child in (node.test, node.body, node.orelse)]
+        return None if None in parts else f'where({", ".join(parts)})'
+    if isinstance(node, ast.Call):
+        parts = [_numexpr_source(child, divides) for child in node.args]
+        return None if None in parts else f'{node.func.id}({", ".join(parts)})'
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node.value, str):
+        return None
+    return repr(node.value)
+
+def _divide(function, left, right, zero_division):
+    # The policy is enforced by the division itself (FP flags or a where= mask), not by a separate scan.
+    left, right = np.asarray(left, dtype=float), np.asarray(right, dtype=float)
+    if zero_division == 'error':
+        try:
+            with np.errstate(divide='raise', invalid='raise'):
+                return function(left, right)
+        except FloatingPointError:
+            raise ZeroDivisionError("Division by zero in expression")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if zero_division == 'nan':
+            out = np.full(np.broadcast(left, right).shape, np.nan)
+            return function(left, right, out=out, where=right != 0)
+        return function(left, right)
+
+def _evaluate(node, values, zero_division):
+    if isinstance(node, ast.BinOp):
+        left = _evaluate(node.left, values, zero_division)
+        right = _evaluate(node.right, values, zero_division)
+        op = _BINARY_OPERATORS[type(node.op)]
+        if op in _DIVISIONS:
+            return _divide(_DIVISIONS[op], left, right, zero_division)
+        return {'+': np.add, '-': np.subtract, '*': np.multiply, '**': np.power}[op](left, right)
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, values, zero_division)
+        if isinstance(node.op, ast.Not):
+            return ~np.asarray(operand, dtype=bool)
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.Compare):
+        result = None
+        left = _evaluate(node.left, values, zero_division)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _evaluate(comparator, values, zero_division)
+            compared = np.asarray({'==': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal,
+                                   '>': np.greater, '>=': np.greater_equal}[_COMPARISONS[type(op)]](left, right))
+            result = compared if result is None else result & compared
+            left = right
+        return result
+    if isinstance(node, ast.BoolOp):
+        parts = [np.asarray(_evaluate(child, values, zero_division), dtype=bool) for child in node.values]
+        return functools.reduce(np.logical_and if isinstance(node.op, ast.And) else np.logical_or, parts)
+    if isinstance(node, ast.IfExp):
+        test = np.asarray(_evaluate(node.test, values, zero_division), dtype=bool)
+        return np.where(test, _evaluate(node.body, values, zero_division), _evaluate(node.orelse, values, zero_division))
+    if isinstance(node, ast.Call):
+        args = [_evaluate(child, values, zero_division) for child in node.args]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return EXPRESSION_FUNCTIONS[node.func.id](*args)
+    if isinstance(node, ast.Name):
+        return values[node.id]
+    return node.value
+
+def evaluate_expression(data, text, zero_division='error'):
+    target, tree, columns = parse_expression(text)
+    missing = [column for column in columns.values() if column not in data.columns]
+    if missing:
+        raise KeyError(f"Columns {missing} not found in dataset.")
+    values = {}
+    for placeholder, column in columns.items():
+        series = data[column]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iu':
+            values[placeholder] = series.to_numpy()
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values[placeholder] = series.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values[placeholder] = series.to_numpy()
+    source = _numexpr_source(tree, zero_division == 'inf') if numexpr is not None else None
+    if source is not None and all(value.dtype.kind in 'fbiu' for value in values.values()):
+        # One multithreaded pass over the columns without materializing intermediates.
+        result = numexpr.evaluate(source, local_dict=values)
+    else:
+        result = _evaluate(tree, values, zero_division)
+    result = np.asarray(result)
+    if result.ndim == 0:
+        result = np.full(len(data), result[()])
+    return target, pd.Series(result, index=data.index)
+
+def apply_expression(data, text, zero_division='error', strict=False):
+    try:
+        target, result = evaluate_expression(data, text, zero_division)
+    except (ValueError, KeyError, ZeroDivisionError, TypeError) as e:
+        if strict:
+            raise
+        print(f"Error: {e.args[0] if isinstance(e, KeyError) else e}")
+        return data
+    data[target] = result
+    return data
+
+def save_data(data, output_file, fmt=None):
+    try:
+        atomic_write(output_file, lambda handle: write_chunks(frame_slices(data), handle), fmt)
+    except ValueError as e:
+        print(f"Error saving data: {e}")
+        return
     print(f"Data saved to {output_file}")
 
-def main():
+class QuantileSketch:
+    # A merging t-digest: weighted centroids re-binned on the arcsine scale once the buffer fills up,
+    # so centroids near the tails hold few values. Exact until more than `capacity` values have
+    # been seen; after that rank error is well under 1/capacity, and smallest at the extremes.
+    def __init__(self, capacity=2000):
+        self.capacity = capacity
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        self.values = np.concatenate([self.values, values])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        if len(self.values) > 2 * self.capacity:
+            self._compress()
+
+    def merge(self, other):
+        self.values = np.concatenate([self.values, other.values])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self.exact = self.exact and other.exact
+        if len(self.values) > 2 * self.capacity:
+            self._compress()
+
+    def _compress(self):
+        order = np.argsort(self.values, kind='stable')
+        values, weights = self.values[order], self.weights[order]
+        ranks = (np.cumsum(weights) - weights / 2) / weights.sum()
+        scale = (np.arcsin(2 * ranks - 1) / np.pi + 0.5) * self.capacity
+        bins = np.minimum(scale.astype(int), self.capacity - 1)
+        totals = np.bincount(bins, weights=weights)
+        keep = totals > 0
+        self.values = (np.bincount(bins, weights=values * weights)[keep]) / totals[keep]
+        self.weights = totals[keep]
+        self.exact = False
+
+    def quantile(self, q):
+        if len(self.values) == 0:
+            return float('nan')
+        order = np.argsort(self.values, kind='stable')
+        values, weights = self.values[order], self.weights[order]
+        if self.exact:
+            return float(np.quantile(values, q))
+        centers = np.cumsum(weights) - weights / 2
+        return float(np.interp(q * weights.sum(), centers, values))
+
+def _leading_zeros(values):
+    # Exact for uint64: each 32-bit half converts to float64 without rounding.
+    high = (values >> np.uint64(32)).astype(float)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(float)
+    with np.errstate(divide='ignore'):
+        zeros = np.where(high > 0, 31 - np.floor(np.log2(high)), 63 - np.floor(np.log2(low)))
+    return np.where(values == 0, 64, zeros).astype(np.int64)
+
+class HyperLogLog:
+    # Distinct values from 2**precision one-byte registers; relative standard error 1.04 / sqrt(2**precision).
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rank = np.minimum(_leading_zeros(hashes << np.uint64(self.precision)) + 1, 65 - self.precision)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is the better estimator while many registers are still empty.
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+class CountMinSketch:
+    # Counts in depth rows of width cells; an estimate is never low, and is high by at most
+    # e / width of the total with probability 1 - exp(-depth).
+    def __init__(self, width=2048, depth=5):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _positions(self, hashes):
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.depth, dtype=np.uint64)
+        return ((low[None, :] + steps[:, None] * high[None, :]) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, hashes, counts):
+        for row, positions in enumerate(self._positions(hashes)):
+            self.table[row] += np.bincount(positions, weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(np.sum(counts))
+
+    def merge(self, other):
+        self.table += other.table
+        self.total += other.total
+
+    def query(self, hashes):
+        if len(hashes) == 0:
+            return np.empty(0, dtype=np.int64)
+        return self.table[np.arange(self.depth)[:, None], self._positions(hashes)].min(axis=0)
+
+    def error(self):
+        return math.e / self.width * self.total
+
+class CategorySketch:
+    # Fixed-memory stand-in for CategoryCounts: count-min estimates for the most frequent values
+    # (candidates are each chunk's exact top values) and a HyperLogLog count of distinct ones.
+    def __init__(self, column, capacity=10 * MAX_CATEGORIES):
+        self.column = column
+        self.capacity = capacity
+        self.count = 0
+        self.counts = CountMinSketch()
+        self.distinct = HyperLogLog()
+        self.candidates = pd.Series(dtype='uint64')
+
+    def update(self, chunk):
+        counts = chunk[self.column].value_counts(sort=False)
+        if counts.empty:
+            return self
+        hashes = key_hashes(pd.DataFrame({self.column: counts.index}), [self.column])
+        self.count += int(counts.sum())
+        self.counts.add(hashes, counts.to_numpy())
+        self.distinct.add(hashes)
+        top = np.argsort(-counts.to_numpy(), kind='stable')[:self.capacity]
+        self._keep(pd.Series(hashes[top], index=counts.index[top]))
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.counts.merge(other.counts)
+        self.distinct.merge(other.distinct)
+        self._keep(other.candidates)
+        return self
+
+    def _keep(self, candidates):
+        candidates = pd.concat([self.candidates, candidates]) if len(self.candidates) else candidates
+        candidates = candidates[~candidates.duplicated()]
+        if len(candidates) > self.capacity:
+            estimates = self.counts.query(candidates.to_numpy())
+            candidates = candidates.iloc[np.argsort(-estimates, kind='stable')[:self.capacity]]
+        self.candidates = candidates
+
+    def estimates(self):
+        counts = pd.Series(self.counts.query(self.candidates.to_numpy()), index=self.candidates.index)
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def top(self, k=MAX_CATEGORIES):
+        counts = self.estimates()
+        if len(counts) > k:
+            counts = counts.iloc[:k - 1]
+        counts.index = counts.index.astype(object)
+        rest = self.count - int(counts.sum())
+        if rest > 0:
+            counts = pd.concat([counts, pd.Series([rest], index=['other'])])
+        return counts
+
+    def note(self):
+        return (f"Approximate: category counts are count-min estimates, each at most "
+                f"{self.counts.error():,.0f} too high (99% confidence).")
+
+def _chunk_moments(values, keys=None):
+    grouped = values if keys is None else values.groupby(keys)
+    count = grouped.count()
+    return {'count': count,
+            'mean': grouped.mean().fillna(0),
+            'm2': (grouped.var(ddof=0) * count).fillna(0),
+            'min': grouped.min(),
+            'max': grouped.max()}
+
+def _merge_moments(left, right):
+    if left is None:
+        return right
+    count_l, count_r = left['count'].align(right['count'], fill_value=0)
+    mean_l, mean_r = left['mean'].align(right['mean'], fill_value=0)
+    m2_l, m2_r = left['m2'].align(right['m2'], fill_value=0)
+    count = count_l + count_r
+    delta = mean_r - mean_l
+    # Chan et al. pairwise update; a group that is empty on one side contributes nothing.
+    share = (count_r / count.where(count > 0)).fillna(0)
+    return {'count': count,
+            'mean': mean_l + delta * share,
+            'm2': m2_l + m2_r + delta ** 2 * count_l * share,
+            'min': pd.concat([left['min'], right['min']]).groupby(level=0, sort=False).min(),
+            'max': pd.concat([left['max'], right['max']]).groupby(level=0, sort=False).max()}
+
+def _datetime_values(dates):
+    # Datetimes are summarized as float nanoseconds since the epoch and turned back into timestamps by describe().
+    return pd.DataFrame({column: pd.Series(dates[column].dt.as_unit('ns').array.asi8, index=dates.index)
+                         .astype(float).where(dates[column].notna()) for column in dates.columns}, index=dates.index)
+
+def _as_datetimes(stats, dtype):
+    # count stays a number and std is left empty, as DataFrame.describe() shows a datetime column.
+    tz = getattr(dtype, 'tz', None)
+    unit = getattr(dtype, 'unit', None) or np.datetime_data(dtype)[0]
+    stamps = pd.to_datetime(stats.drop(['count', 'std']), unit='ns', utc=tz is not None)
+    if tz is not None:
+        stamps = stamps.dt.tz_convert(tz)
+    stamps = stamps.dt.round(unit).dt.as_unit(unit)
+    result = stats.astype(object)
+    result['count'] = int(stats['count'])
+    result[stamps.index] = list(stamps)
+    result['std'] = np.nan
+    return result
+
+def _merge_counts(left, right):
+    # Keep first-seen order so ties resolve the same way value_counts() does on the whole column.
+    return pd.concat([left, right]).groupby(level=0, sort=False).sum()
+
+class DataStats:
+    def __init__(self, quantile_capacity=2000, sketch=False):
+        self.quantile_capacity = quantile_capacity
+        self.sketch = sketch
+        self.columns = None
+        self.non_numeric = set()
+        self.datetimes = {}
+        self.moments = None
+        self.sketches = {}
+        self.value_counts = None
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        dates = chunk.select_dtypes(include=['datetime', 'datetimetz'])
+        self.datetimes.update((column, dates[column].dtype) for column in dates.columns)
+        numeric = pd.concat([chunk.select_dtypes(include='number'), _datetime_values(dates)], axis=1)
+        self.non_numeric.update(column for column in chunk.columns
+                                if column not in numeric.columns and chunk[column].notna().any())
+        self.moments = _merge_moments(self.moments, _chunk_moments(numeric))
+        for column in numeric.columns:
+            sketch = self.sketches.setdefault(column, QuantileSketch(self.quantile_capacity))
+            sketch.update(numeric[column].dropna().to_numpy())
+        if self.value_counts is not None or (self.moments['count'].empty and len(chunk.columns)):
+            if self.sketch:
+                counts = {column: CategorySketch(column).update(chunk) for column in chunk.columns}
+            else:
+                counts = {column: chunk[column].value_counts() for column in chunk.columns}
+            if self.value_counts is None:
+                self.value_counts = counts
+            else:
+                for column, series in counts.items():
+                    self.value_counts[column] = _merge_values(self.value_counts[column], series)
+        return self
+
+    def merge(self, other):
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.columns = other.columns
+        self.non_numeric.update(other.non_numeric)
+        self.datetimes.update(other.datetimes)
+        self.moments = _merge_moments(self.moments, other.moments)
+        for column, sketch in other.sketches.items():
+            if column in self.sketches:
+                self.sketches[column].merge(sketch)
+            else:
+                self.sketches[column] = sketch
+        if self.value_counts is None:
+            self.value_counts = other.value_counts
+        elif other.value_counts is not None:
+            for column, series in other.value_counts.items():
+                self.value_counts[column] = _merge_values(self.value_counts[column], series)
+        return self
+
+    def numeric_columns(self):
+        if self.moments is None:
+            return []
+        return [column for column in self.columns
+                if column in self.moments['count'].index and column not in self.non_numeric]
+
+    def means(self):
+        columns = [column for column in self.numeric_columns() if column not in self.datetimes]
+        count = self.moments['count'][columns] if columns else pd.Series(dtype=float)
+        return self.moments['mean'][columns].where(count > 0).to_dict() if columns else {}
+
+    def describe(self):
+        columns = self.numeric_columns()
+        if not columns:
+            return self._describe_objects()
+        count = self.moments['count'][columns].astype(float)
+        mean = self.moments['mean'][columns].where(count > 0)
+        std = np.sqrt(self.moments['m2'][columns] / (count - 1).where(count > 1))
+        rows = {'count': count, 'mean': mean, 'std': std, 'min': self.moments['min'][columns]}
+        for q in (0.25, 0.5, 0.75):
+            rows[f"{q:.0%}"] = pd.Series({column: self.sketches[column].quantile(q) for column in columns})
+        rows['max'] = self.moments['max'][columns]
+        result = pd.DataFrame(rows).T[columns]
+        for column in columns:
+            if column in self.datetimes:
+                result[column] = _as_datetimes(result[column], self.datetimes[column])
+        return result
+
+    def _describe_objects(self):
+        rows = {}
+        for column in self.columns or []:
+            counts = (self.value_counts or {}).get(column, pd.Series(dtype=float))
+            if isinstance(counts, CategorySketch):
+                top = counts.estimates()
+                rows[column] = {'count': counts.count, 'unique': round(counts.distinct.estimate()),
+                                'top': top.index[0] if len(top) else np.nan,
+                                'freq': int(top.iloc[0]) if len(top) else np.nan}
+                continue
+            top = counts.idxmax() if len(counts) else np.nan
+            rows[column] = {'count': int(counts.sum()), 'unique': len(counts),
+                            'top': top, 'freq': int(counts.max()) if len(counts) else np.nan}
+        return pd.DataFrame(rows, index=['count', 'unique', 'top', 'freq'])
+
+    def note(self):
+        columns = self.numeric_columns()
+        if any(not self.sketches[column].exact for column in columns):
+            return (f"Approximate: the 25%/50%/75% rows are t-digest estimates, within about "
+                    f"{1 / self.quantile_capacity:.2%} of the true rank; count, mean, std, min and max are exact.")
+        sketches = [counts for counts in (self.value_counts or {}).values() if isinstance(counts, CategorySketch)]
+        if not sketches or columns:
+            return None
+        return (f"Approximate: unique is a HyperLogLog estimate (within {1.96 * sketches[0].distinct.relative_error():.1%}, "
+                f"95% confidence); freq is a count-min estimate, at most "
+                f"{max(sketch.counts.error() for sketch in sketches):,.0f} too high (99% confidence).")
+
+def _merge_values(left, right):
+    return left.merge(right) if isinstance(left, CategorySketch) else _merge_counts(left, right)
+
+class GroupStats:
+    def __init__(self, groupby_column):
+        self.groupby_column = groupby_column
+        self.counts = None
+        self.sums = None
+        self.moments = None
+
+    def update(self, chunk):
+        grouped = chunk.groupby(self.groupby_column, observed=True)
+        numeric = chunk.drop(columns=[self.groupby_column]).select_dtypes(include='number')
+        skipped = [column for column in _unsummable(chunk) if column != self.groupby_column]
+        summable = chunk.drop(columns=skipped).groupby(self.groupby_column, observed=True)
+        self._merge(grouped.count(), summable.sum(min_count=1),
+                    _chunk_moments(numeric, chunk[self.groupby_column]))
+        return self
+
+    def merge(self, other):
+        if other.counts is not None:
+            self._merge(other.counts, other.sums, other.moments)
+        return self
+
+    def _merge(self, counts, sums, moments):
+        if self.counts is None:
+            self.counts, self.sums, self.moments = counts, sums, moments
+            return
+        self.counts = self.counts.add(counts, fill_value=0)
+        self.sums = pd.concat([self.sums, sums]).groupby(level=0, sort=False).sum(min_count=1)
+        self.moments = _merge_moments(self.moments, moments)
+
+    def result(self, aggregation_func):
+        if self.counts is None:
+            return pd.DataFrame()
+        if aggregation_func == "count":
+            result = self.counts.fillna(0).astype(int)
+        elif aggregation_func == "sum":
+            result = self.sums.copy()
+            numeric = result.select_dtypes(include='number').columns
+            result[numeric] = result[numeric].fillna(0)
+        else:
+            count = self.moments['count']
+            if aggregation_func == "mean":
+                result = self.moments['mean'].where(count > 0)
+            elif aggregation_func == "std":
+                result = np.sqrt(self.moments['m2'] / (count - 1).where(count > 1))
+            else:
+                result = self.moments[aggregation_func]
+        result = result.sort_index()
+        result.index.name = self.groupby_column
+        return result
+
+def collect_stats(chunks, stats):
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+def plan_columns(args, columns):
+    needed = {'visualize': [args.column], 'index': [args.column], 'filter': [args.column], 'sort': args.sort_by or [args.column],
+              'dedupe': args.keys or [args.column],
+              'transform': transform_columns(args), 'aggregate': [args.groupby]}.get(args.operation, [])
+    if args.operation in ('visualize', 'index'):
+        wanted = set(needed)
+    elif args.select:
+        wanted = set(args.select) | set(needed)
+    else:
+        return None
+    return [column for column in columns if column in wanted]
+
+def transform_columns(args):
+    if args.expr:
+        try:
+            return expression_columns(args.expr)
+        except ValueError:
+            return []
+    return list(args.columns or [])
+
+def transform_target(args):
+    if args.expr:
+        return args.expr.partition('=')[0].strip().strip('`')
+    return args.new_column
+
+def with_usecols(schema, usecols):
+    if usecols is None:
+        return schema
+    schema = dict(schema or {})
+    schema['usecols'] = usecols
+    return schema
+
+def project(data, args):
+    if not args.select:
+        return data
+    keep = list(args.select) + ([transform_target(args)] if args.operation == 'transform' else [])
+    return data[[column for column in data.columns if column in keep]]
+
+def load_filtered(file_path, column, value, schema=None, chunksize=100000, use_cache=False, low=None, high=None):
+    # Evaluate the predicate chunk by chunk so rejected rows never accumulate in memory.
+    if REGISTRY is not None:
+        data = load_data(file_path, use_cache, schema=schema)
+        return filter_data(data, column, value, low, high) if data is not None else None
+    if use_cache:
+        with PROFILER.stage('load'):
+            data = read_cache(file_path, schema)
+        if data is not None:
+            PROFILER.add_rows('load', len(data))
+            return filter_data(data, column, value, low, high)
+    chunks = load_chunks(file_path, chunksize, schema)
+    if chunks is None:
+        return None
+    parts = [filter_data(chunk, column, value, low, high) for chunk in chunks]
+    if not parts:
+        return pd.DataFrame(columns=read_columns(file_path, schema))
+    return pd.concat(parts)
+
+INDEX_CHUNK_ROWS = 1_000_000
+
+def index_dir(file_path):
+    return f"{file_path}.idx"
+
+def _index_paths(file_path, column):
+    name = hashlib.blake2b(str(column).encode(), digest_size=8).hexdigest()
+    base = os.path.join(index_dir(file_path), name)
+    return {'meta': f"{base}.json", 'keys': f"{base}.keys.npy", 'rows': f"{base}.rows.npy",
+            'offsets': f"{base}.offsets.npy"}
+
+def _index_options(schema, column):
+    # Only the reader options that change how this column parses; an index built under others is not used.
+    options = reader_options(schema)
+    na_values = options.get('na_values')
+    return {'dtype': str(options.get('dtype', {}).get(column)),
+            'parse_dates': column in options.get('parse_dates', []),
+            'na_values': na_values.get(column) if isinstance(na_values, dict) else na_values}
+
+def line_offsets(file_path, block_size=1 << 24):
+    # Byte offset of every data line, found with a vectorized newline scan over large blocks.
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as handle:
+        handle.readline()
+        data_start = handle.tell()
+        parts = [np.array([data_start], dtype=np.int64)]
+        position = data_start
+        while position < size:
+            block = handle.read(block_size)
+            ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10) + position + 1
+            parts.append(ends.astype(np.int64))
+            position += len(block)
+    offsets = np.concatenate(parts)
+    return offsets[offsets < size]
+
+def _index_values(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime', series.astype('datetime64[ns]').astype('int64')
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return 'number', series.astype('float64')
+    return 'text', series.astype(str)
+
+def _index_query(value, value_type):
+    if value_type == 'datetime':
+        return pd.Series([pd.Timestamp(value).as_unit('ns').value], dtype='int64')
+    if value_type == 'number':
+        return pd.Series([float(value)], dtype='float64')
+    return pd.Series([value]).astype(str)
+
+def _index_kind(kind, value_type, column):
+    kind = kind or ('sorted' if value_type in ('number', 'datetime') else 'hash')
+    if kind == 'sorted' and value_type == 'text':
+        raise ValueError(f"a sorted index needs a numeric or datetime column; use a hash index for {column}")
+    return kind
+
+def build_index(file_path, column, kind=None, schema=None):
+    # keys sorted (values for a sorted index, 64-bit hashes for a hash index), with each entry's
+    # row number and the byte offset of its line.
+    offsets = line_offsets(file_path)
+    keys, rows, value_type, row = [], [], None, 0
+    options = dict(reader_options(schema), usecols=[column])
+    for chunk in pd.read_csv(file_path, chunksize=INDEX_CHUNK_ROWS, **options):
+        series = chunk[column]
+        present = series.notna().to_numpy()
+        if present.any():
+            chunk_type, values = _index_values(series[present])
+            if value_type not in (None, chunk_type):
+                raise ValueError(f"column {column} parses as {value_type} in some rows and {chunk_type} in others; "
+                                 "give it one dtype with --schema")
+            value_type = chunk_type
+            kind = _index_kind(kind, value_type, column)
+            # Only the keys are kept between chunks: 64-bit hashes, or the numbers themselves.
+            keys.append(pd.util.hash_pandas_object(values, index=False).to_numpy() if kind == 'hash'
+                        else values.to_numpy())
+            rows.append(np.flatnonzero(present) + row)
+        row += len(chunk)
+    if row != len(offsets):
+        raise ValueError("an index needs exactly one record per line "
+                         "(no blank lines or line breaks inside quoted fields)")
+    value_type = value_type or 'text'
+    kind = _index_kind(kind, value_type, column)
+    keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64 if kind == 'hash' else np.float64)
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    order = np.argsort(keys, kind='stable')
+    paths = _index_paths(file_path, column)
+    os.makedirs(index_dir(file_path), exist_ok=True)
+    for name, array in (('keys', keys[order]), ('rows', rows[order]), ('offsets', offsets[rows[order]])):
+        fd, temp_path = tempfile.mkstemp(dir=index_dir(file_path), suffix='.npy')
+        with os.fdopen(fd, 'wb') as handle:
+            np.save(handle, array)
+        os.replace(temp_path, paths[name])
+    stat = os.stat(file_path)
+    meta = {'column': column, 'kind': kind, 'value_type': value_type, 'rows': int(len(offsets)),
+            'entries': int(len(keys)), 'options': _index_options(schema, column), 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns, 'content_hash': content_hash(file_path)}
+    _write_index_meta(paths['meta'], meta)
+    return meta
+
+def _write_index_meta(path, meta):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as handle:
+        json.dump(meta, handle, indent=1)
+    os.replace(temp_path, path)
+
+def remove_index(file_path, column):
+    for path in _index_paths(file_path, column).values():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def load_index(file_path, column, schema=None):
+    paths = _index_paths(file_path, column)
+    try:
+        with open(paths['meta']) as handle:
+            meta = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    mtime_ns = meta['mtime_ns']
+    if not _fingerprint_matches(file_path, meta):
+        print(f"Index on {column} is out of date and was removed; run 'index' again to rebuild it.")
+        remove_index(file_path, column)
+        return None
+    if meta['options'] != _index_options(schema, column):
+        return None
+    if meta['mtime_ns'] != mtime_ns:
+        try:
+            _write_index_meta(paths['meta'], meta)
+        except OSError:
+            pass
+    # Memory-mapped: a lookup only touches the pages around its binary search.
+    arrays = {name: np.load(paths[name], mmap_mode='r') for name in ('keys', 'rows', 'offsets')}
+    return dict(meta, **arrays)
+
+def index_lookup(index, value=None, low=None, high=None):
+    # Rows (ascending) and line offsets of the candidates; None when this index cannot answer the query.
+    keys = index['keys']
+    try:
+        if value is not None:
+            query = _index_query(value, index['value_type'])
+            if index['kind'] == 'hash':
+                query = pd.util.hash_pandas_object(query, index=False)
+            key = query.to_numpy()[0]
+            start, end = np.searchsorted(keys, key, 'left'), np.searchsorted(keys, key, 'right')
+        elif index['kind'] == 'sorted':
+            start = 0 if low is None else np.searchsorted(keys, _index_query(low, index['value_type']).to_numpy()[0], 'left')
+            end = len(keys) if high is None else np.searchsorted(keys, _index_query(high, index['value_type']).to_numpy()[0], 'right')
+        else:
+            return None
+    except ValueError:
+        # Not a number/date: the scan would not match anything either.
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows = np.asarray(index['rows'][start:end])
+    offsets = np.asarray(index['offsets'][start:end])
+    order = np.argsort(rows, kind='stable')
+    return rows[order], offsets[order]
+
+def read_rows_at(file_path, offsets, schema=None):
+    with open(file_path, 'rb') as handle:
+        lines = [handle.readline()]
+        for offset in offsets:
+            handle.seek(offset)
+            line = handle.readline()
+            lines.append(line if line.endswith(b'\n') else line + b'\n')
+    return narrow_dtypes(pd.read_csv(io.BytesIO(b''.join(lines)), **reader_options(schema)), schema)
+
+def indexed_filter(args):
+    # Returns the filtered frame, or None when there is no usable index and the file must be scanned.
+    if args.no_index or not args.column:
+        return None
+    index = load_index(args.file, args.column, args.schema)
+    if index is None:
+        return None
+    found = index_lookup(index, args.value, args.min_value, args.max_value)
+    if found is None:
+        return None
+    rows, offsets = found
+    with PROFILER.stage('load'):
+        data = read_rows_at(args.file, offsets, args.schema)
+    PROFILER.add_rows('load', len(data))
+    data.index = pd.Index(rows)
+    # Hash collisions and parse differences are settled by running the real predicate on the candidates.
+    return filter_data(data, args.column, args.value, args.min_value, args.max_value)
+
+SAMPLE_BLOCK_ROWS = 64
+Z_95 = 1.96
+
+def block_sample(file_path, rows, schema=None, seed=0, block_rows=SAMPLE_BLOCK_ROWS):
+    # A run of block_rows lines from a random offset in each of rows / block_rows equal slices of the
+    # file: only the sampled bytes are read, and row counts and positions are estimated from their
+    # average length. Returns the sample, the row count, whether it is exact and its relative standard error.
+    rng = np.random.default_rng(seed)
+    size = os.path.getsize(file_path)
+    lines, starts, block_starts = [], [], []
+    with open(file_path, 'rb') as handle:
+        header = handle.readline()
+        data_start = position = handle.tell()
+        head = b''.join(handle.readline() for _ in range(block_rows))
+        if rows * len(head) >= (size - data_start) * max(head.count(b'\n'), 1):
+            # The sample would be about as big as the file: read all of it.
+            data = pd.read_csv(file_path, **reader_options(schema))
+            return data, len(data), True, 0.0
+        blocks = -(-rows // block_rows)
+        span = (size - data_start) / blocks
+        skipped = 0
+        for i in range(blocks):
+            offset = max(data_start + int(span * (i + rng.random())), position)
+            if offset >= size:
+                break
+            handle.seek(offset - 1)
+            handle.readline()
+            skipped += handle.tell() - position
+            block_starts.append(len(lines))
+            for _ in range(block_rows):
+                starts.append(handle.tell())
+                line = handle.readline()
+                if not line:
+                    starts.pop()
+                    break
+                lines.append(line if line.endswith(b'\n') else line + b'\n')
+            position = handle.tell()
+    skipped += size - position
+    data = pd.read_csv(io.BytesIO(header + b''.join(lines)), **reader_options(schema))
+    if not skipped:
+        return data, len(lines), True, 0.0
+    lengths = np.array([len(line) for line in lines], dtype=float)
+    row_bytes = lengths.mean() if lines else 1
+    if len(data) == len(starts):
+        data.index = pd.Index(np.rint((np.array(starts) - data_start) / row_bytes).astype(np.int64))
+    # Rows in a block are neighbours, so the spread of the block means gives the error of row_bytes.
+    means = [part.mean() for part in np.split(lengths, block_starts[1:]) if len(part)]
+    spread = means if len(means) > 1 else lengths
+    error = np.std(spread, ddof=1) / math.sqrt(len(spread)) / row_bytes if len(spread) > 1 else 0.0
+    return data, round((size - data_start) / row_bytes) if lines else 0, False, float(error)
+
+def reservoir_sample(file_path, rows, schema=None, seed=0, block_size=1 << 24):
+    # Every line start gets a random key and the rows smallest keys are kept: a uniform sample and the
+    # exact row count from one vectorized newline scan, with only the sampled rows parsed.
+    rng = np.random.default_rng(seed)
+    size = os.path.getsize(file_path)
+    offsets, numbers, keys = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    population = 0
+    with open(file_path, 'rb') as handle:
+        handle.readline()
+        position = handle.tell()
+        starts = np.array([position], dtype=np.int64)
+        while position < size:
+            block = handle.read(block_size)
+            ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10) + position + 1
+            position += len(block)
+            starts = np.concatenate([starts, ends.astype(np.int64)])
+            starts = starts[starts < size]
+            offsets = np.concatenate([offsets, starts])
+            numbers = np.concatenate([numbers, np.arange(population, population + len(starts))])
+            keys = np.concatenate([keys, rng.random(len(starts))])
+            population += len(starts)
+            if len(keys) > rows:
+                keep = np.argpartition(keys, rows)[:rows]
+                offsets, numbers, keys = offsets[keep], numbers[keep], keys[keep]
+            starts = np.empty(0, dtype=np.int64)
+    order = np.argsort(offsets)
+    data = read_rows_at(file_path, offsets[order], schema)
+    if len(data) == len(order):
+        data.index = pd.Index(numbers[order])
+    return data, population, True, 0.0
+
+def load_sample(file_path, rows, method='block', schema=None, seed=0):
+    # Returns the sample indexed by row number in the file, the (estimated) number of rows in the
+    # file, whether that number is exact and its relative standard error.
+    if file_format(file_path) != 'csv':
+        # No line offsets to seek to in compressed or columnar files: load them and sample the frame.
+        data = load_data(file_path, schema=schema)
+        if data is None:
+            return None
+        return data.sample(min(rows, len(data)), random_state=seed).sort_index(), len(data), True, 0.0
+    with PROFILER.stage('load'):
+        if method == 'reservoir':
+            sample = reservoir_sample(file_path, rows, schema, seed)
+        else:
+            sample = block_sample(file_path, rows, schema, seed)
+    PROFILER.add_rows('load', len(sample[0]))
+    return sample
+
+def _finite_population(n, population):
+    # A sample of the whole file has no sampling error left.
+    return math.sqrt(max(population - n, 0) / (population - 1)) if population > 1 else 0.0
+
+def _count_margin(estimate, share, n, scale, fpc, population_error):
+    # Sampling error of the share, plus the error of the row count it is scaled up by.
+    sampling = Z_95 * scale * np.sqrt(n * share * (1 - share)) * fpc
+    return np.sqrt(sampling ** 2 + (Z_95 * population_error * estimate) ** 2)
+
+def sampled_describe(data, population, population_error=0.0):
+    n = len(data)
+    scale = population / n if n else 0.0
+    fpc = _finite_population(n, population)
+    described = data.describe()
+    rows = {}
+    for name, row in described.iterrows():
+        if name in ('count', 'freq'):
+            share = row.astype(float) / n
+            rows[name] = (row.astype(float) * scale).round()
+            rows[f"{name} ±"] = _count_margin(row.astype(float) * scale, share, n, scale, fpc, population_error).round()
+        elif name == 'unique':
+            rows['unique in sample'] = row
+        else:
+            rows[name] = row
+        if name == 'mean':
+            rows['mean ±'] = Z_95 * described.loc['std'] / np.sqrt(described.loc['count'].astype(float)) * fpc
+    return pd.DataFrame(rows).T[described.columns]
+
+def sampled_aggregate(data, groupby_column, aggregation_func, population, population_error=0.0):
+    n = len(data)
+    scale = population / n if n else 0.0
+    fpc = _finite_population(n, population)
+    result = aggregate_data(data, groupby_column, aggregation_func)
+    grouped = data.groupby(groupby_column)
+    margin = None
+    if aggregation_func == 'count':
+        margin = _count_margin(result * scale, result / n, n, scale, fpc, population_error).round().astype(int)
+        result = (result * scale).round().astype(int)
+    elif aggregation_func == 'sum':
+        numeric = result.select_dtypes(include='number').columns
+        # Each group's total is the sum over every row of value * (row in group).
+        squares = (data[numeric] ** 2).groupby(data[groupby_column]).sum()
+        variance = (squares - result[numeric] ** 2 / n) / max(n - 1, 1)
+        margin = Z_95 * scale * np.sqrt(n * variance.clip(lower=0)) * fpc
+        result[numeric] = result[numeric] * scale
+        margin = np.sqrt(margin ** 2 + (Z_95 * population_error * result[numeric]) ** 2)
+    elif aggregation_func == 'mean':
+        margin = Z_95 * grouped.std(numeric_only=True) / np.sqrt(grouped.count()[result.columns]) * fpc
+    columns = {}
+    for column in result.columns:
+        columns[column] = result[column]
+        if margin is not None and column in margin.columns:
+            columns[f"{column} ±"] = margin[column]
+    return pd.DataFrame(columns)
+
+def run_sampled(args):
+    columns = read_columns(args.file, args.schema)
+    if columns is None or not check_columns(args, columns):
+        return
+    try:
+        sample = load_sample(args.file, args.sample, args.sample_method, args.schema, args.seed)
+    except (OSError, ValueError, pd.errors.ParserError) as e:
+        print(f"Error loading file: {e}")
+        return
+    if sample is None:
+        return
+    data, population, exact, population_error = sample
+    if data.empty:
+        print("Error: the sample is empty.")
+        return
+    scale = population / len(data)
+    whole = exact and len(data) == population
+    method = args.sample_method if file_format(args.file) == 'csv' else 'random'
+    counted = f"{population:,} rows" if exact else f"about {population:,} ± {Z_95 * population_error * population:,.0f} rows"
+    note = f"Approximate: {len(data):,}-row {method} sample of {counted}; ± is a 95% interval."
+    if whole:
+        note = f"The sample is the whole file ({population:,} rows), so the results are exact."
+    if args.operation == 'summary':
+        print("Summary Statistics:\n", sampled_describe(data, population, population_error))
+        if not whole and not data.select_dtypes(include='number').empty:
+            note += f" Quantiles are within {Z_95 * 0.5 / math.sqrt(len(data)):.2%} in rank; min and max are the sample's."
+        print(note)
+    elif args.operation == 'aggregate' and args.groupby and args.aggregation:
+        print(sampled_aggregate(data, args.groupby, args.aggregation, population, population_error))
+        print(note)
+    elif args.operation == 'visualize' and args.column and args.visualization:
+        if args.column not in data.columns:
+            print("Column not found in dataset.")
+            return
+        value_range = None
+        if args.visualization == 'hist' and pd.api.types.is_numeric_dtype(data[args.column]):
+            value_range = column_range([data], args.column)
+        stats = plot_stats([data], args.visualization, args.column, value_range)
+        # Counts are scaled up to the whole file; line x values are already row numbers in the file.
+        if isinstance(stats, HistogramStats):
+            stats.counts = np.rint(stats.counts * scale).astype(np.int64)
+        elif isinstance(stats, CategoryCounts):
+            stats.counts = (stats.counts * scale).round().astype(np.int64)
+        print(note)
+        visualize(data, args, stats)
+
+def stream_chunks(chunks, operation, *args):
+    for chunk in chunks:
+        yield operation(chunk, *args)
+
+def is_filter(args):
+    return args.column and (args.value is not None or args.min_value is not None or args.max_value is not None)
+
+def is_row_operation(args):
+    return ((args.operation == 'filter' and is_filter(args))
+            or (args.operation == 'clean' and args.action)
+            or (args.operation == 'transform' and is_transform(args))
+            or (args.operation == 'save' and args.output))
+
+def is_transform(args):
+    return args.expr or (args.new_column and args.math_operation and args.columns)
+
+class RowOperationError(ValueError):
+    pass
+
+def run_transform(data, args, strict=False):
+    if args.expr:
+        return apply_expression(data, args.expr, args.zero_division, strict)
+    return transform_data(data, args.new_column, args.math_operation, args.columns, args.zero_division, strict)
+
+def apply_row_operation(chunk, args, means=None):
+    if args.operation == 'filter':
+        chunk = filter_data(chunk, args.column, args.value, args.min_value, args.max_value)
+    elif args.operation == 'clean':
+        chunk = handle_missing_data(chunk, args.action, args.fill_value, means)
+    elif args.operation == 'transform':
+        # A chunk the transform rejects fails the whole stream, as it would in memory.
+        try:
+            chunk = run_transform(chunk, args, strict=True)
+        except (ValueError, KeyError, ZeroDivisionError, TypeError) as e:
+            raise RowOperationError(f"transform failed: {e.args[0] if isinstance(e, KeyError) else e}") from e
+    return project(chunk, args)
+
+def write_chunks(chunks, handle):
+    rows = 0
+    columns = None
+    for chunk in chunks:
+        header = columns is None
+        if header:
+            columns = list(chunk.columns)
+        elif list(chunk.columns) != columns:
+            raise RowOperationError(f"columns changed mid-stream from {columns} to {list(chunk.columns)}")
+        if isinstance(handle, FrameWriter):
+            handle.write_frame(chunk)
+        else:
+            chunk.to_csv(handle, header=header, index=False)
+        rows += len(chunk)
+    return rows
+
+def _output_mode(output_file):
+    # mkstemp creates 0600 files; the result should keep the target's mode, or follow the umask if new.
+    try:
+        return stat.S_IMODE(os.stat(output_file).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def atomic_write(output_file, write, fmt=None):
+    # Write next to the target and swap it in at the end, so --modify can stream over its own input.
+    # write() gets a text handle for CSV, a compressing text writer for .gz/.zst, or a FrameWriter.
+    fmt = file_format(output_file, fmt)
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with PROFILER.stage('save'):
+            if fmt == 'csv':
+                with os.fdopen(fd, 'w', newline='') as handle:
+                    result = write(handle)
+            elif fmt in ('csv.gz', 'csv.zst'):
+                with os.fdopen(fd, 'wb') as raw:
+                    handle = GzipBlockWriter(raw) if fmt == 'csv.gz' else ZstdWriter(raw)
+                    try:
+                        result = write(handle)
+                    finally:
+                        handle.close()
+            else:
+                os.close(fd)
+                handle = FrameWriter(temp_path, fmt)
+                try:
+                    result = write(handle)
+                finally:
+                    handle.close()
+            os.chmod(temp_path, _output_mode(output_file))
+            os.replace(temp_path, output_file)
+        if isinstance(result, int):
+            PROFILER.add_rows('save', result)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return result
+
+def save_chunks(chunks, output_file, fmt=None):
+    try:
+        rows = atomic_write(output_file, lambda handle: write_chunks(chunks, handle), fmt)
+    except RowOperationError as e:
+        print(f"Error: {e}. Nothing was saved.")
+        return
+    except ValueError as e:
+        print(f"Error saving data: {e}")
+        return
+    print(f"Data saved to {output_file} ({rows} rows)")
+
+def print_chunks(chunks):
+    with PROFILER.stage('print'):
+        rows = write_chunks(chunks, sys.stdout)
+    PROFILER.add_rows('print', rows)
+
+def copy_text(source_file, handle):
+    with open(source_file, newline='') as source:
+        shutil.copyfileobj(source, handle)
+
+def deliver_rows(args, write):
+    targets = [args.output] if args.output else []
+    if args.operation == 'clean' and args.modify:
+        targets.insert(0, args.file)
+    if not targets:
+        if args.operation != 'clean' or args.show:
+            try:
+                with PROFILER.stage('print'):
+                    rows = write(sys.stdout)
+            except RowOperationError as e:
+                print(f"Error: {e}")
+                return
+            PROFILER.add_rows('print', rows or 0)
+        return
+    try:
+        rows = atomic_write(targets[-1], write, args.format if args.output else None)
+        print(f"Data saved to {targets[-1]} ({rows} rows)")
+        for target in targets[:-1]:
+            atomic_write(target, lambda handle: copy_output(targets[-1], handle))
+            print(f"Data saved to {target} ({rows} rows)")
+    except RowOperationError as e:
+        print(f"Error: {e}. Nothing was saved.")
+        return
+    except ValueError as e:
+        print(f"Error saving data: {e}")
+        return
+    if args.operation == 'clean' and args.show:
+        print("Cleaned Data:")
+        copy_output(targets[-1], sys.stdout)
+
+def check_columns(args, columns):
+    needed = [args.column] if args.operation == 'filter' else transform_columns(args) if args.operation == 'transform' else []
+    if args.operation == 'aggregate':
+        needed = [args.groupby]
+    elif args.operation == 'sort':
+        needed = args.sort_by or [args.column]
+    elif args.operation == 'dedupe':
+        needed = args.keys or [args.column]
+    for column in needed:
+        if column and column not in columns:
+            print(f"Error: Column '{column}' not found in dataset.")
+            return False
+    return True
+
+def print_summary(stats):
+    print("Summary Statistics:\n", stats.describe())
+    note = stats.note()
+    if note:
+        print(note)
+
+def run_streaming(args):
+    columns = read_columns(args.file, args.schema)
+    if columns is None or not check_columns(args, columns):
+        return
+
+    chunks = load_chunks(args.file, args.chunksize, args.schema)
+    if chunks is None:
+        return
+
+    if args.operation == 'summary':
+        print_summary(collect_stats(chunks, DataStats(sketch=args.sketch)))
+    elif args.operation == 'aggregate' and args.groupby and args.aggregation:
+        print(collect_stats(chunks, GroupStats(args.groupby)).result(args.aggregation))
+    elif is_row_operation(args):
+        means = None
+        if args.operation == 'clean' and args.action == 'fill' and args.fill_value == 'mean':
+            means = collect_stats(load_chunks(args.file, args.chunksize, args.schema), DataStats()).means()
+        result = PROFILER.iterate(args.operation, stream_chunks(chunks, apply_row_operation, args, means), count_rows=False)
+        deliver_rows(args, lambda handle: write_chunks(result, handle))
+    else:
+        chunks.close()
+
+class RangeReader:
+    # Read-only file object limited to the bytes [start, end) of a file, for pd.read_csv.
+    def __init__(self, file_path, start, end):
+        self.handle = open(file_path, 'rb')
+        self.handle.seek(start)
+        self.remaining = end - start
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.handle.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self.handle.readline(self.remaining if size is None or size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self):
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def split_byte_ranges(file_path, parts):
+    # Ranges start right after a newline, so quoted fields must not contain line breaks.
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as handle:
+        handle.readline()
+        data_start = handle.tell()
+        bounds = [data_start]
+        for i in range(1, parts):
+            position = data_start + (size - data_start) * i // parts
+            if position <= bounds[-1]:
+                continue
+            handle.seek(position - 1)
+            handle.readline()
+            if bounds[-1] < handle.tell() < size:
+                bounds.append(handle.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def load_range_chunks(file_path, start, end, columns, chunksize, schema=None):
+    reader = RangeReader(file_path, start, end)
+    try:
+        for chunk in pd.read_csv(reader, header=None, names=columns, chunksize=chunksize, **reader_options(schema)):
+            yield narrow_dtypes(chunk, schema)
+    except pd.errors.EmptyDataError:
+        return
+    finally:
+        reader.close()
+
+def _partition_stats(task):
+    file_path, start, end, columns, chunksize, schema, stats = task
+    return collect_stats(load_range_chunks(file_path, start, end, columns, chunksize, schema), stats)
+
+def _partition_rows(task):
+    file_path, start, end, columns, chunksize, args, means, part_file = task
+    chunks = load_range_chunks(file_path, start, end, columns, chunksize, args.schema)
+    with open(part_file, 'w', newline='') as handle:
+        return write_chunks(stream_chunks(chunks, apply_row_operation, args, means), handle)
+
+def merge_partitions(part_files, handle):
+    if isinstance(handle, FrameWriter):
+        chunks = (chunk for part_file in part_files if os.path.getsize(part_file)
+                  for chunk in pd.read_csv(part_file, chunksize=WRITE_CHUNK_ROWS))
+        write_chunks(chunks, handle)
+        return
+    header = None
+    for part_file in part_files:
+        with open(part_file, newline='') as source:
+            first_line = source.readline()
+            if not first_line:
+                continue
+            if header is None:
+                header = first_line
+                handle.write(first_line)
+            elif first_line != header:
+                raise RowOperationError(f"partition {part_file} has different columns")
+            shutil.copyfileobj(source, handle)
+
+def run_parallel(args):
+    columns = read_columns(args.file)
+    if columns is None or not check_columns(args, read_columns(args.file, args.schema)):
+        return
+    chunksize = args.chunksize or 100000
+    ranges = split_byte_ranges(args.file, args.workers)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        def gather_stats(stats):
+            tasks = [(args.file, start, end, columns, chunksize, args.schema, stats) for start, end in ranges]
+            merged = stats
+            for partial in pool.map(_partition_stats, tasks):
+                merged.merge(partial)
+            return merged
+
+        if args.operation == 'summary':
+            print_summary(gather_stats(DataStats(sketch=args.sketch)))
+        elif args.operation == 'aggregate' and args.groupby and args.aggregation:
+            print(gather_stats(GroupStats(args.groupby)).result(args.aggregation))
+        elif is_row_operation(args):
+            means = None
+            if args.operation == 'clean' and args.action == 'fill' and args.fill_value == 'mean':
+                means = gather_stats(DataStats()).means()
+            with tempfile.TemporaryDirectory() as temp_dir:
+                part_files = [os.path.join(temp_dir, f"part-{i:05d}.csv") for i in range(len(ranges))]
+                tasks = [(args.file, start, end, columns, chunksize, args, means, part_file)
+                         for (start, end), part_file in zip(ranges, part_files)]
+                try:
+                    # A partition whose row operation fails raises here and fails the whole run.
+                    rows = sum(pool.map(_partition_rows, tasks))
+                except RowOperationError as e:
+                    print(f"Error: {e}. Nothing was saved.")
+                    return
+
+                def write(handle):
+                    merge_partitions(part_files, handle)
+                    return rows
+                deliver_rows(args, write)
+
+PIPELINE_STEPS = {
+    'clean': ('action',),
+    'dedupe': ('column',),
+    'filter': ('column', 'value'),  # or min_value/max_value for a range
+    'transform': ('new_column', 'math_operation', 'columns'),  # or just 'expr'
+    'aggregate': ('groupby', 'aggregation'),
+    'summary': (),
+    'save': ('output',),
+}
+
+def load_pipeline(spec_file):
+    with open(spec_file) as handle:
+        if spec_file.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ValueError("PyYAML is required for YAML pipeline specs (pip install pyyaml)")
+            spec = yaml.safe_load(handle)
+        else:
+            spec = json.load(handle)
+    return spec['steps'] if isinstance(spec, dict) else spec
+
+def parse_steps(texts):
+    # Chained syntax: op:key=value,key=value  (list values joined with '+', e.g. columns=Salary+Bonus)
+    steps = []
+    for text in texts:
+        op, _, options = text.partition(':')
+        step = {'op': op}
+        for option in filter(None, options.split(',')):
+            key, _, value = option.partition('=')
+            step[key] = value.split('+') if key == 'columns' else value
+        steps.append(step)
+    return steps
+
+def validate_steps(steps):
+    for i, step in enumerate(steps):
+        op = step.get('op')
+        if op not in PIPELINE_STEPS:
+            return f"Step {i + 1}: unknown operation '{op}'"
+        required = PIPELINE_STEPS[op]
+        if op == 'transform' and 'expr' in step:
+            required = ('expr',)
+        elif op == 'filter' and ('min_value' in step or 'max_value' in step):
+            required = ('column',)
+        missing = [key for key in required if not step.get(key)]
+        if missing:
+            return f"Step {i + 1} ({op}): missing {', '.join(missing)}"
+        if op == 'dedupe' and step.get('keep', 'first') not in ('first', 'last'):
+            return f"Step {i + 1} (dedupe): keep must be 'first' or 'last'"
+        later = [other['op'] for other in steps[i + 1:]]
+        if op in ('aggregate', 'summary') and any(other != 'save' for other in later):
+            return f"Step {i + 1} ({op}): only 'save' may follow {op}"
+    return None
+
+def step_columns(step):
+    # The columns a step reads, and the column it adds (transforms only).
+    op = step['op']
+    if op == 'transform':
+        if 'expr' in step:
+            target, _, names = parse_expression(step['expr'])
+            return list(names.values()), target
+        return list(step['columns']), step['new_column']
+    if op == 'aggregate':
+        return [step['groupby']], None
+    if op in ('filter', 'dedupe'):
+        column = step['column']
+        return [column] if isinstance(column, str) else list(column), None
+    return [], None
+
+def check_step_columns(steps, columns):
+    # Like check_columns, but each step also sees the columns added by the transforms before it.
+    available = list(columns)
+    for i, step in enumerate(steps):
+        try:
+            needed, added = step_columns(step)
+        except ValueError as e:
+            return f"Step {i + 1} ({step['op']}): {e}"
+        for column in needed:
+            if column not in available:
+                return f"Step {i + 1} ({step['op']}): column '{column}' not found in dataset"
+        if added:
+            available.append(added)
+    return None
+
+def is_row_step(step):
+    return step['op'] in ('clean', 'dedupe', 'filter', 'transform')
+
+def key_hashes(chunk, columns):
+    # Numbers hash as float64 so a key reads the same whether or not its chunk also held NaNs.
+    keys = chunk[columns].copy()
+    for column in columns:
+        if pd.api.types.is_numeric_dtype(keys[column]) and not pd.api.types.is_bool_dtype(keys[column]):
+            keys[column] = keys[column].astype('float64')
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+class HashSet:
+    # Sorted uint64 levels merged LSM-style; past max_hashes the levels are spilled to a memory-mapped file.
+    def __init__(self, max_hashes=50_000_000, temp_dir=None):
+        self.max_hashes = max_hashes
+        self.temp_dir = temp_dir
+        self.levels = []
+        self.spilled = []
+        self.spill_files = []
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels + self.spilled)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for level in self.levels + self.spilled:
+            if len(level):
+                positions = np.minimum(np.searchsorted(level, hashes), len(level) - 1)
+                found |= level[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        self.levels.append(np.sort(hashes))
+        while len(self.levels) > 1 and len(self.levels[-2]) <= 2 * len(self.levels[-1]):
+            last = self.levels.pop()
+            self.levels[-1] = np.sort(np.concatenate([self.levels[-1], last]), kind='mergesort')
+        if sum(len(level) for level in self.levels) > self.max_hashes:
+            self._spill()
+
+    def _spill(self):
+        merged = np.sort(np.concatenate(self.levels), kind='mergesort')
+        fd, spill_file = tempfile.mkstemp(dir=self.temp_dir, suffix='.npy')
+        os.close(fd)
+        np.save(spill_file, merged)
+        self.spilled.append(np.load(spill_file, mmap_mode='r'))
+        self.spill_files.append(spill_file)
+        self.levels = []
+
+    def close(self):
+        self.spilled = []
+        for spill_file in self.spill_files:
+            os.remove(spill_file)
+        self.spill_files = []
+
+class BloomFilter:
+    # Fixed-size bit array; once `capacity` keys are in, about error_rate of new keys are wrongly dropped.
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, hashes):
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (low[:, None] + steps[None, :] * high[:, None]) % np.uint64(self.size)
+
+    def contains(self, hashes):
+        positions = self._positions(hashes)
+        shifts = (positions & np.uint64(7)).astype(np.uint8)
+        return ((self.bits[positions >> np.uint64(3)] >> shifts) & 1).all(axis=1)
+
+    def add(self, hashes):
+        positions = self._positions(hashes).ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+
+    def close(self):
+        pass
+
+def _first_unseen(hashes, seen):
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    keep[keep] = ~seen.contains(hashes[keep])
+    seen.add(hashes[keep])
+    return keep
+
+def dedupe_chunk(chunk, columns, seen):
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    return chunk[_first_unseen(key_hashes(chunk, columns), seen)]
+
+def dedupe_keep_last(file_path, columns, seen, chunksize, schema=None, temp_dir=None):
+    # Pass 1 spills every row's key hash; a backwards scan marks last occurrences; pass 2 applies the mask.
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    with tempfile.TemporaryDirectory(dir=temp_dir) as work_dir:
+        hash_file = os.path.join(work_dir, 'hashes.bin')
+        rows = 0
+        with open(hash_file, 'wb') as handle:
+            for chunk in load_chunks(file_path, chunksize, schema):
+                key_hashes(chunk, columns).tofile(handle)
+                rows += len(chunk)
+        if rows == 0:
+            return
+        hashes = np.memmap(hash_file, dtype=np.uint64, mode='r', shape=(rows,))
+        keep = np.memmap(os.path.join(work_dir, 'keep.bin'), dtype=bool, mode='w+', shape=(rows,))
+        for end in range(rows, 0, -chunksize):
+            start = max(0, end - chunksize)
+            keep[start:end] = _first_unseen(np.array(hashes[start:end][::-1]), seen)[::-1]
+        position = 0
+        for chunk in load_chunks(file_path, chunksize, schema):
+            yield chunk[np.asarray(keep[position:position + len(chunk)])]
+            position += len(chunk)
+        del hashes, keep
+
+def make_seen(args):
+    if args.bloom_error_rate:
+        return BloomFilter(args.expected_rows, args.bloom_error_rate)
+    return HashSet(args.max_hashes, args.temp_dir)
+
+def run_dedupe(args):
+    keys = args.keys or [args.column]
+    seen = make_seen(args)
+    try:
+        if args.keep == 'last':
+            rows = dedupe_keep_last(args.file, keys, seen, args.chunksize, args.schema, args.temp_dir)
+        else:
+            chunks = load_chunks(args.file, args.chunksize, args.schema)
+            if chunks is None:
+                return
+            rows = stream_chunks(chunks, dedupe_chunk, keys, seen)
+        rows = PROFILER.iterate('dedupe', (project(chunk, args) for chunk in rows), count_rows=False)
+        if args.output:
+            save_chunks(rows, args.output, args.format)
+        else:
+            print_chunks(rows)
+    finally:
+        seen.close()
+
+def apply_step(data, step, state=None, strict=False):
+    # state is a streamed dedupe's set of seen keys; strict (streaming) raises instead of skipping a chunk.
+    op = step['op']
+    if op == 'clean':
+        return handle_missing_data(data, step['action'], step.get('fill_value', 'Unknown'), step.get('means'), copy=False)
+    elif op == 'dedupe':
+        if state is None:
+            return remove_duplicates(data, step['column'], step.get('keep', 'first'))
+        return dedupe_chunk(data, step['column'], state)
+    elif op == 'filter':
+        return filter_data(data, step['column'], step.get('value'), step.get('min_value'), step.get('max_value'))
+    elif op == 'transform':
+        zero_division = step.get('zero_division', 'error')
+        try:
+            if 'expr' in step:
+                return apply_expression(data, step['expr'], zero_division, strict)
+            return transform_data(data, step['new_column'], step['math_operation'], step['columns'], zero_division, strict)
+        except (ValueError, KeyError, ZeroDivisionError, TypeError) as e:
+            raise RowOperationError(f"transform failed: {e.args[0] if isinstance(e, KeyError) else e}") from e
+    return data
+
+def fuse_steps(chunks, steps, args):
+    # Every row-local step runs on a chunk before the next chunk is read: one pass, no intermediates.
+    states = [make_seen(args) if step['op'] == 'dedupe' else None for step in steps]
+    try:
+        for chunk in chunks:
+            for step, state in zip(steps, states):
+                chunk = apply_step(chunk, step, state, strict=True)
+            yield chunk
+    finally:
+        for state in states:
+            if state is not None:
+                state.close()
+
+def finish_pipeline(result, terminal):
+    if terminal is None:
+        print(result)
+        return
+    if terminal['op'] == 'save':
+        save_data(result, terminal['output'], terminal.get('format'))
+        return
+    if terminal['op'] == 'summary':
+        print("Summary Statistics:\n", result)
+    else:
+        print(result)
+
+def saved_result(result, reduce_step):
+    # Files are written without the index, so a summary keeps its count/mean/... labels as a column.
+    if reduce_step is not None and reduce_step['op'] == 'summary':
+        return result.reset_index(names='statistic')
+    return result
+
+def run_pipeline(args, steps):
+    row_steps = [step for step in steps if is_row_step(step)]
+    final_steps = steps[len(row_steps):]
+    if any(not is_row_step(step) for step in steps[:len(row_steps)]) or \
+            any(step['op'] == 'save' for step in steps[:-1]):
+        print("Error: 'save' is only supported as the last pipeline step.")
+        return
+    reduce_step = next((step for step in final_steps if step['op'] in ('aggregate', 'summary')), None)
+    save_step = final_steps[-1] if final_steps and final_steps[-1]['op'] == 'save' else None
+
+    if not args.chunksize:
+        data = load_data(args.file, use_cache=not args.no_cache, cache_limit_mb=args.cache_size, schema=args.schema)
+        if data is None:
+            return
+        for step in row_steps:
+            data = apply_step(data, step)
+        if reduce_step is None:
+            result = data
+        elif reduce_step['op'] == 'aggregate':
+            result = aggregate_data(data, reduce_step['groupby'], reduce_step['aggregation']).reset_index()
+        else:
+            result = data.describe()
+        if save_step is None:
+            finish_pipeline(result, reduce_step)
+        else:
+            save_data(saved_result(result, reduce_step), save_step['output'], save_step.get('format'))
+        return
+
+    if any(step['op'] == 'dedupe' and step.get('keep', 'first') == 'last' for step in row_steps):
+        print("Error: dedupe with keep=last needs two passes; run this pipeline without --chunksize.")
+        return
+
+    def source():
+        return load_chunks(args.file, args.chunksize, args.schema)
+
+    for i, step in enumerate(row_steps):
+        if step['op'] == 'clean' and step['action'] == 'fill' and step.get('fill_value') == 'mean':
+            # Fill-with-mean needs the column means as they stand at this point of the pipeline.
+            step['means'] = collect_stats(fuse_steps(source(), row_steps[:i], args), DataStats()).means()
+    chunks = source()
+    if chunks is None:
+        return
+    rows = PROFILER.iterate('pipeline', fuse_steps(chunks, row_steps, args), count_rows=False)
+    try:
+        if reduce_step is None:
+            if save_step is None:
+                print_chunks(rows)
+            else:
+                save_chunks(rows, save_step['output'], save_step.get('format'))
+            return
+        if reduce_step['op'] == 'aggregate':
+            result = collect_stats(rows, GroupStats(reduce_step['groupby'])).result(reduce_step['aggregation']).reset_index()
+        else:
+            stats = collect_stats(rows, DataStats())
+            result = stats.describe()
+    except RowOperationError as e:
+        print(f"Error: {e}")
+        return
+    if save_step is None:
+        finish_pipeline(result, reduce_step)
+        if reduce_step['op'] == 'summary' and stats.note():
+            print(stats.note())
+    else:
+        save_data(saved_result(result, reduce_step), save_step['output'], save_step.get('format'))
+
+SORT_ROW = '__row'
+
+def _sort_frame(frame, by, ascending):
+    # The global row number breaks ties, so every merge step sees a total order and the sort is stable.
+    return frame.sort_values(by=by + [SORT_ROW], ascending=ascending + [True], kind='stable', na_position='last')
+
+@functools.total_ordering
+class _Descending:
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+class _RunBuffer:
+    # The unconsumed part of one block of a sorted run, with its key columns as plain arrays.
+    def __init__(self, frame, by):
+        self.frame = frame
+        self.start = 0
+        self.keys = [frame[column].to_numpy() for column in by] + [frame[SORT_ROW].to_numpy()]
+
+    def __len__(self):
+        return len(self.frame) - self.start
+
+    def key(self, position, ascending):
+        key = []
+        for values, asc in zip(self.keys, ascending):
+            value = values[position]
+            missing = pd.isna(value)
+            value = 0 if missing else value
+            key.append((missing, value if asc else _Descending(value)))
+        key.append(self.keys[-1][position])
+        return tuple(key)
+
+    def count_at_most(self, bound, ascending):
+        low, high = self.start, len(self.frame)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle, ascending) <= bound:
+                low = middle + 1
+            else:
+                high = middle
+        return low - self.start
+
+    def take(self, count):
+        part = self.frame.iloc[self.start:self.start + count]
+        self.start += count
+        return part
+
+def write_run(blocks, run_file):
+    with open(run_file, 'wb') as handle:
+        for block in blocks:
+            pickle.dump(block, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+def read_run(run_file):
+    with open(run_file, 'rb') as handle:
+        while True:
+            try:
+                yield pickle.load(handle)
+            except EOFError:
+                return
+
+def _split_blocks(frame, block_rows):
+    for start in range(0, len(frame), block_rows):
+        yield frame.iloc[start:start + block_rows]
+
+def merge_runs(run_files, by, ascending, block_rows):
+    readers = [read_run(run_file) for run_file in run_files]
+
+    def next_buffer(reader):
+        block = next(reader, None)
+        return None if block is None else _RunBuffer(block, by)
+
+    buffers = [next_buffer(reader) for reader in readers]
+    while True:
+        active = [i for i, buffer in enumerate(buffers) if buffer is not None]
+        if not active:
+            return
+        # Rows up to the smallest "last loaded key" are final: no unread row of any run can precede them.
+        bound = min(buffers[i].key(len(buffers[i].frame) - 1, ascending) for i in active)
+        parts = []
+        for i in active:
+            taken = buffers[i].count_at_most(bound, ascending)
+            if taken:
+                parts.append(buffers[i].take(taken))
+            if not len(buffers[i]):
+                buffers[i] = next_buffer(readers[i])
+        yield _sort_frame(pd.concat(parts), by, ascending)
+
+def external_sort(chunks, by, ascending, temp_dir, chunksize, fan_in=64):
+    block_rows = max(1000, chunksize // fan_in)
+    runs = []
+    row = 0
+    for chunk in chunks:
+        chunk[SORT_ROW] = np.arange(row, row + len(chunk))
+        row += len(chunk)
+        run_file = os.path.join(temp_dir, f"run-{len(runs):06d}.pkl")
+        write_run(_split_blocks(_sort_frame(chunk, by, ascending), block_rows), run_file)
+        runs.append(run_file)
+    generation = 0
+    while len(runs) > fan_in:
+        # Too many runs to hold a block of each in memory: merge them in groups first.
+        generation += 1
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            run_file = os.path.join(temp_dir, f"merge-{generation}-{len(merged):06d}.pkl")
+            blocks = (block for part in merge_runs(runs[start:start + fan_in], by, ascending, block_rows)
+                      for block in _split_blocks(part, block_rows))
+            write_run(blocks, run_file)
+            for old in runs[start:start + fan_in]:
+                os.remove(old)
+            merged.append(run_file)
+        runs = merged
+    # Merge steps emit small slices; batch them so writers see chunk-sized frames.
+    pending, pending_rows = [], 0
+    for part in merge_runs(runs, by, ascending, block_rows):
+        pending.append(part)
+        pending_rows += len(part)
+        if pending_rows >= chunksize:
+            yield pd.concat(pending).drop(columns=SORT_ROW)
+            pending, pending_rows = [], 0
+    if pending:
+        yield pd.concat(pending).drop(columns=SORT_ROW)
+
+def top_rows(data, by, ascending, n):
+    if len(by) == 1 and pd.api.types.is_numeric_dtype(data[by[0]]) and data[by[0]].notna().sum() >= min(n, len(data)):
+        # Partial selection instead of a full sort.
+        return data.nsmallest(n, by[0], keep='first') if ascending[0] else data.nlargest(n, by[0], keep='first')
+    return data.sort_values(by=by, ascending=ascending, kind='stable', na_position='last').head(n)
+
+def streaming_top(chunks, by, ascending, n):
+    best = None
+    for chunk in chunks:
+        candidates = chunk if best is None else pd.concat([best, chunk])
+        best = top_rows(candidates, by, ascending, n)
+    return best
+
+def sort_order(args):
+    by = args.sort_by or [args.column]
+    order = args.order or ['asc']
+    if len(order) == 1:
+        order = order * len(by)
+    return by, [direction == 'asc' for direction in order]
+
+def run_streaming_sort(args):
+    by, ascending = sort_order(args)
+    if len(ascending) != len(by):
+        print("Error: --order needs one direction, or one per sort column.")
+        return
+    chunks = load_chunks(args.file, args.chunksize, args.schema)
+    if chunks is None:
+        return
+    if args.top:
+        result = streaming_top(chunks, by, ascending, args.top)
+        if args.output:
+            save_data(project(result, args), args.output, args.format)
+        else:
+            print(project(result, args))
+        return
+    with tempfile.TemporaryDirectory(dir=args.temp_dir) as temp_dir:
+        rows = (project(part, args) for part in external_sort(chunks, by, ascending, temp_dir, args.chunksize))
+        rows = PROFILER.iterate('sort', rows, count_rows=False)
+        if args.output:
+            save_chunks(rows, args.output, args.format)
+        else:
+            print_chunks(rows)
+
+def visualize(data, args, stats=None):
+    if args.visualization == 'hist':
+        plot_histogram(data, args.column, args.plot_output, stats)
+    elif args.visualization == 'pie':
+        plot_pie_chart(data, args.column, args.plot_output, stats, args.max_categories)
+    elif args.visualization == 'bar':
+        plot_bar_chart(data, args.column, args.plot_output, stats, args.max_categories)
+    elif args.visualization == 'line':
+        plot_line_graph(data, args.column, args.plot_output, stats)
+
+def run_streaming_plot(args):
+    # Only the reduced plot data (bin counts, category counts, decimated points) is kept in memory;
+    # a histogram reads the column twice, once for its range and once to fill the bins.
+    chunks = load_chunks(args.file, args.chunksize, args.schema)
+    if chunks is None:
+        return
+    try:
+        head = next(iter(chunks))
+    except StopIteration:
+        head = pd.DataFrame(columns=read_columns(args.file, args.schema) or [])
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return
+    finally:
+        chunks.close()
+    if args.column not in head.columns:
+        print("Column not found in dataset.")
+        return
+    value_range = None
+    if args.visualization == 'hist' and pd.api.types.is_numeric_dtype(head[args.column]):
+        value_range = column_range(load_chunks(args.file, args.chunksize, args.schema), args.column)
+    chunks = load_chunks(args.file, args.chunksize, args.schema)
+    if chunks is None:
+        return
+    stats = plot_stats(chunks, args.visualization, args.column, value_range, args.sketch)
+    if isinstance(stats, CategorySketch):
+        print(stats.note())
+    visualize(head, args, stats)
+
+class Profiler:
+    # Exclusive per-stage accounting: entering a stage pauses the one that was running, so when
+    # generators are chained (load -> operation -> save) each chunk's time lands on the stage that spent it.
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.stack = []
+        self.mark = None
+
+    def start(self):
+        self.enabled = True
+        self.stages = {}
+        self.stack = []
+        self.mark = (time.perf_counter(), time.process_time())
+
+    def stop(self):
+        while self.stack:
+            self._exit()
+        self.enabled = False
+
+    def _record(self, name):
+        return self.stages.setdefault(name, {'stage': name, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': None,
+                                             'peak_rss_mb': None, 'peak_traced_mb': None})
+
+    def _charge(self):
+        now = (time.perf_counter(), time.process_time())
+        if self.stack:
+            record = self.stages[self.stack[-1]]
+            record['wall_s'] += now[0] - self.mark[0]
+            record['cpu_s'] += now[1] - self.mark[1]
+            record['peak_rss_mb'] = peak_rss_mb()
+            if tracemalloc.is_tracing():
+                # The traced peak since the last switch belongs to the stage that was running.
+                traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                record['peak_traced_mb'] = max(record['peak_traced_mb'] or 0, traced)
+                tracemalloc.reset_peak()
+        self.mark = now
+
+    def _enter(self, name):
+        self._charge()
+        self._record(name)
+        self.stack.append(name)
+
+    def _exit(self):
+        self._charge()
+        self.stack.pop()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield {}
+            return
+        self._enter(name)
+        try:
+            yield self.stages[name]
+        finally:
+            self._exit()
+
+    def add_rows(self, name, rows):
+        if self.enabled:
+            record = self._record(name)
+            record['rows'] = (record['rows'] or 0) + rows
+
+    def iterate(self, name, chunks, count_rows=True):
+        if not self.enabled:
+            return chunks
+
+        def timed():
+            iterator = iter(chunks)
+            try:
+                while True:
+                    self._enter(name)
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        self._exit()
+                    if count_rows:
+                        self.add_rows(name, len(chunk))
+                    yield chunk
+            finally:
+                if hasattr(chunks, 'close'):
+                    chunks.close()
+        return timed()
+
+    def report(self, operation=None):
+        order = ['load', operation, 'save', 'print', 'plot']
+        records = []
+        for record in sorted(self.stages.values(), key=lambda r: order.index(r['stage']) if r['stage'] in order else 0):
+            record = dict(record)
+            record['rows_per_s'] = record['rows'] / record['wall_s'] if record['rows'] and record['wall_s'] else None
+            records.append(record)
+        return records
+
+PROFILER = Profiler()
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def format_profile(records, total):
+    header = f"{'stage':<12}{'wall s':>10}{'cpu s':>10}{'rows':>12}{'rows/s':>14}{'peak RSS MB':>13}{'traced MB':>11}"
+    lines = [header, '-' * len(header)]
+    for record in records + [total]:
+        number = lambda value, spec: format(value, spec) if value is not None else '-'
+        lines.append(f"{record['stage']:<12}{record['wall_s']:>10.3f}{record['cpu_s']:>10.3f}"
+                     f"{number(record['rows'], ','):>12}{number(record['rows_per_s'], ',.0f'):>14}"
+                     f"{number(record['peak_rss_mb'], '.1f'):>13}{number(record['peak_traced_mb'], '.1f'):>11}")
+    return '\n'.join(lines)
+
+def profiled_run(args, argv=None):
+    # Stages: 'load', the operation itself (everything not spent loading or writing), 'save'/'print', 'plot'.
+    if args.tracemalloc:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if args.cprofile else None
+    PROFILER.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with PROFILER.stage(args.operation) as record:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                run(args)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        PROFILER.stop()
+        records = PROFILER.report(args.operation)
+        load = PROFILER.stages.get('load', {})
+        for record in records:
+            if record['stage'] == args.operation and record['rows'] is None and load.get('rows'):
+                record['rows'] = load['rows']
+                record['rows_per_s'] = record['rows'] / record['wall_s'] if record['wall_s'] else None
+        total = {'stage': 'total', 'wall_s': time.perf_counter() - wall, 'cpu_s': time.process_time() - cpu,
+                 'rows': load.get('rows'), 'peak_rss_mb': peak_rss_mb(),
+                 'peak_traced_mb': max((r['peak_traced_mb'] or 0 for r in records), default=None) if args.tracemalloc else None}
+        total['rows_per_s'] = total['rows'] / total['wall_s'] if total['rows'] and total['wall_s'] else None
+        if args.profile == 'json':
+            line = json.dumps({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'file': args.file,
+                               'operation': args.operation, 'argv': argv if argv is not None else sys.argv[1:],
+                               'total': total, 'stages': records})
+            if args.profile_output:
+                with open(args.profile_output, 'a') as handle:
+                    handle.write(line + '\n')
+            else:
+                print(line, file=sys.stderr)
+        elif args.profile:
+            table = format_profile(records, total)
+            if args.profile_output:
+                with open(args.profile_output, 'a') as handle:
+                    handle.write(table + '\n')
+            else:
+                print(table, file=sys.stderr)
+        if profiler is not None:
+            profiler.dump_stats(args.cprofile)
+            print(f"cProfile stats saved to {args.cprofile} (view with: python -m pstats {args.cprofile})", file=sys.stderr)
+        if args.tracemalloc:
+            tracemalloc.take_snapshot().dump(args.tracemalloc)
+            tracemalloc.stop()
+            print(f"tracemalloc snapshot saved to {args.tracemalloc} (load with tracemalloc.Snapshot.load)", file=sys.stderr)
+
+SERVE_MAX_DATASETS = 8
+SERVE_MEMORY_MB = 4096
+SERVE_TOKEN_ENV = 'CSVTOOL_SERVE_TOKEN'
+SERVE_TOKEN_MIN_LENGTH = 16
+SERVE_AUTH_TIMEOUT = 10
+SERVE_HELP = ("Commands: <file> <operation> [options] (as on the command line), load <file> [options], "
+              "datasets, drop [file], help, quit, shutdown")
+
+class DatasetRegistry:
+    # Parsed frames kept between serve requests, least recently used evicted first once there are more
+    # than max_datasets or they hold more than memory_mb; a file changed on disk is parsed again.
+    def __init__(self, max_datasets=SERVE_MAX_DATASETS, memory_mb=SERVE_MEMORY_MB):
+        self.max_datasets = max_datasets
+        self.memory_limit = memory_mb * 1024 * 1024
+        self.entries = collections.OrderedDict()
+
+    def get(self, file_path, use_cache=False, cache_limit_mb=CACHE_LIMIT_MB, schema=None):
+        # The whole file is registered; each request takes its own --select columns from it.
+        options = {key: value for key, value in (schema or {}).items() if key != 'usecols'} or None
+        key = (os.path.abspath(file_path), json.dumps(options, sort_keys=True, default=str))
+        try:
+            file_stat = os.stat(file_path)
+        except OSError as e:
+            print(f"Error loading file: {e}")
+            return None
+        entry = self.entries.get(key)
+        if entry is None or (entry['size'], entry['mtime_ns']) != (file_stat.st_size, file_stat.st_mtime_ns):
+            data = _load_data(file_path, use_cache, cache_limit_mb, options)
+            if data is None:
+                self.entries.pop(key, None)
+                return None
+            entry = {'data': data, 'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns, 'hits': 0,
+                     'bytes': int(data.memory_usage(deep=True).sum())}
+            self.entries[key] = entry
+            self.evict()
+        else:
+            entry['hits'] += 1
+        self.entries.move_to_end(key)
+        usecols = (schema or {}).get('usecols')
+        if usecols is not None:
+            return entry['data'][[column for column in usecols if column in entry['data'].columns]]
+        # Shallow, so a transform adding a column leaves the registered frame as it was.
+        return entry['data'].copy(deep=False)
+
+    def evict(self):
+        while len(self.entries) > 1 and (len(self.entries) > self.max_datasets or
+                                         sum(entry['bytes'] for entry in self.entries.values()) > self.memory_limit):
+            self.entries.popitem(last=False)
+
+    def drop(self, file_path=None):
+        keys = [key for key in self.entries if file_path is None or key[0] == os.path.abspath(file_path)]
+        for key in keys:
+            del self.entries[key]
+        return len(keys)
+
+class ServeSession:
+    # One request at a time: everything the operation prints is captured and returned as its reply.
+    def __init__(self, registry):
+        self.registry = registry
+        self.parser = build_parser()
+        self.lock = threading.Lock()
+
+    def execute(self, line):
+        wall = time.perf_counter()
+        output = io.StringIO()
+        command, ok = None, True
+        with self.lock, contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                argv = shlex.split(line)
+                command = argv[0] if argv else None
+                if command == 'help':
+                    print(SERVE_HELP)
+                elif command == 'datasets':
+                    self.list_datasets()
+                elif command == 'drop':
+                    print(f"Dropped {self.registry.drop(argv[1] if len(argv) > 1 else None)} dataset(s).")
+                elif command == 'load':
+                    self.load(argv[1:])
+                elif command not in (None, 'quit', 'exit', 'shutdown'):
+                    self.run_command(argv)
+            except SystemExit as e:
+                # argparse has already printed the usage message.
+                ok = not e.code
+            except Exception as e:
+                print(f"Error: {e}")
+        text = output.getvalue()
+        ok = ok and not any(part.startswith('Error') for part in text.splitlines())
+        return {'command': command, 'ok': ok, 'output': text, 'seconds': round(time.perf_counter() - wall, 6)}
+
+    def run_command(self, argv):
+        args = self.parser.parse_args(argv)
+        if args.operation == 'visualize' and not args.plot_output:
+            print("Error: visualize needs --plot_output in serve mode.")
+        elif args.profile or args.cprofile or args.tracemalloc:
+            profiled_run(args, argv)
+        else:
+            run(args)
+
+    def load(self, argv):
+        if not argv:
+            print("Error: load needs a file.")
+            return
+        args = self.parser.parse_args([argv[0], 'summary'] + argv[1:])
+        if not resolve_schema(args):
+            return
+        data = load_data(args.file, use_cache=not args.no_cache, cache_limit_mb=args.cache_size, schema=args.schema)
+        if data is not None:
+            print(f"Loaded {args.file}: {len(data)} rows, {len(data.columns)} columns.")
+
+    def list_datasets(self):
+        if not self.registry.entries:
+            print("No datasets loaded.")
+        for (path, options), entry in reversed(self.registry.entries.items()):
+            schema = '' if options == 'null' else '  (schema)'
+            print(f"{path}  {len(entry['data'])} rows  {entry['bytes'] / (1024 * 1024):.1f} MB  {entry['hits']} hits{schema}")
+
+def read_serve_token(token_file=None):
+    # Any local user can connect to a TCP port, so --port needs a shared secret: the token file
+    # (readable by its owner only) or the CSVTOOL_SERVE_TOKEN environment variable.
+    if token_file:
+        try:
+            if stat.S_IMODE(os.stat(token_file).st_mode) & 0o077:
+                print(f"Error: {token_file} must only be readable by its owner (chmod 600 {token_file}).")
+                return None
+            with open(token_file) as handle:
+                token = handle.read().strip()
+        except OSError as e:
+            print(f"Error reading token file: {e}")
+            return None
+    else:
+        token = os.environ.get(SERVE_TOKEN_ENV, '').strip()
+        if not token:
+            print(f"Error: --port needs a token: set {SERVE_TOKEN_ENV} or pass --token_file.")
+            return None
+    if len(token) < SERVE_TOKEN_MIN_LENGTH:
+        print(f"Error: the serve token must be at least {SERVE_TOKEN_MIN_LENGTH} characters.")
+        return None
+    return token
+
+class _ServeHandler(socketserver.StreamRequestHandler):
+    def authenticate(self):
+        # The first line of a TCP connection must be the token; nothing else is read until it matches.
+        self.request.settimeout(SERVE_AUTH_TIMEOUT)
+        try:
+            line = self.rfile.readline(1024)
+        except OSError:
+            return False
+        ok = hmac.compare_digest(line.strip(), self.server.token.encode())
+        reply = {'command': 'auth', 'ok': ok, 'output': '' if ok else "Error: invalid token\n", 'seconds': 0.0}
+        self.wfile.write((json.dumps(reply) + '\n').encode())
+        self.request.settimeout(None)
+        return ok
+
+    def handle(self):
+        if self.server.token is not None and not self.authenticate():
+            return
+        for raw in self.rfile:
+            reply = self.server.session.execute(raw.decode('utf-8', 'replace'))
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+            if reply['command'] == 'shutdown':
+                # shutdown() waits for serve_forever, which is waiting for this handler.
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            if reply['command'] in ('quit', 'exit', 'shutdown'):
+                return
+
+def serve_socket(session, socket_path=None, port=None, token=None):
+    if socket_path:
+        if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+            print("Error: Unix sockets are not available on this platform; use --port.")
+            return
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                print(f"Error: {socket_path} exists and is not a socket.")
+                return
+            os.remove(socket_path)
+        server = socketserver.ThreadingUnixStreamServer(socket_path, _ServeHandler)
+        os.chmod(socket_path, 0o600)
+        address = socket_path
+    else:
+        # Loopback only: requests can read and write any file this user can.
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', port), _ServeHandler, bind_and_activate=False)
+        server.allow_reuse_address = True
+        server.server_bind()
+        server.server_activate()
+        address = '%s:%d' % server.server_address
+    server.daemon_threads = True
+    server.session = session
+    # A Unix socket is guarded by its 0600 mode; only TCP connections send the token.
+    server.token = None if socket_path else token
+    print(f"Serving on {address} (send 'shutdown' or press Ctrl+C to stop)", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def serve_stdin(session, as_json=False):
+    interactive = sys.stdin.isatty() and not as_json
+    while True:
+        try:
+            line = input('csvtool> ') if interactive else sys.stdin.readline()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if not interactive and not line:
+            break
+        reply = session.execute(line)
+        if as_json:
+            print(json.dumps(reply), flush=True)
+        else:
+            sys.stdout.write(reply['output'])
+            sys.stdout.flush()
+        if reply['command'] in ('quit', 'exit', 'shutdown'):
+            break
+
+def serve(args):
+    global REGISTRY
+    token = None
+    if args.port is not None and not args.socket:
+        token = read_serve_token(args.token_file)
+        if token is None:
+            return
+    REGISTRY = DatasetRegistry(args.max_datasets, args.memory_mb)
+    session = ServeSession(REGISTRY)
+    if args.socket or args.port is not None:
+        serve_socket(session, args.socket, args.port, token)
+    else:
+        serve_stdin(session, args.json)
+
+def build_parser():
     parser = argparse.ArgumentParser(description='CLI Data Analysis Tool')
     parser.add_argument('file', help='Path to the CSV file')
-    parser.add_argument('operation', choices=['summary', 'visualize', 'filter', 'sort', 'clean', 'aggregate', 'transform', 'save'], help='Operation to perform')
+    parser.add_argument('operation', choices=['summary', 'visualize', 'filter', 'sort', 'clean', 'aggregate', 'transform', 'save', 'dedupe', 'pipeline', 'index', 'cache-clear'], help='Operation to perform')
     parser.add_argument('--column', type=str, help='Column name for various operations')
     parser.add_argument('--value', type=str, help='Value for filtering data')
+    parser.add_argument('--min_value', type=str, help='Filter to rows where --column is at least this value')
+    parser.add_argument('--max_value', type=str, help='Filter to rows where --column is at most this value')
+    parser.add_argument('--index_type', choices=['hash', 'sorted'], help='Index kind for index (default: sorted for numeric and datetime columns, hash otherwise)')
+    parser.add_argument('--no-index', action='store_true', help='Scan the file for filter even if a valid index exists')
     parser.add_argument('--visualization', choices=['hist', 'pie', 'bar', 'line'], help='Type of visualization to display')
+    parser.add_argument('--plot_output', type=str, help='Render the visualization to this PNG/SVG/PDF file instead of a window (no display needed)')
+    parser.add_argument('--max_categories', type=int, default=MAX_CATEGORIES, help='Pie and bar charts show this many categories, the rest are grouped as "other"')
     parser.add_argument('--action', choices=['drop', 'fill'], help='Action for handling missing data')
     parser.add_argument('--fill_value', type=str, default="Unknown", help='Fill value for missing data (used with "fill" action)')
     parser.add_argument('--groupby', type=str, help='Column name for grouping data')
-    parser.add_argument('--aggregation', choices=['mean', 'sum', 'count'], help='Aggregation function for groupby')
+    parser.add_argument('--aggregation', choices=['mean', 'sum', 'count', 'min', 'max', 'std'], help='Aggregation function for groupby')
     parser.add_argument('--new_column', type=str, help='New column to create')
     parser.add_argument('--math_operation', choices=['divide', 'multiply', 'add', 'subtract'], help='Mathematical operation for column transformation')
     parser.add_argument('--columns', nargs=2, type=str, help='Columns for transformation operation (e.g., for divide: column1 column2)')
+    parser.add_argument('--expr', type=str, help='Transform with an expression, e.g. "margin = (revenue - cost) / revenue * 100"')
+    parser.add_argument('--zero_division', choices=ZERO_DIVISION, default='error', help='Division by zero in transforms: stop with an error, give NaN, or give +/-inf')
     parser.add_argument('--output', type=str, help='Path to save the processed data')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help='Output format (default: from the --output extension: .parquet, .feather/.arrow, .csv.gz, .csv.zst, else CSV)')
     parser.add_argument('--modify', action='store_true', help='Modify the original file')
     parser.add_argument('--show', action='store_true', help='Show the output in terminal')
+    parser.add_argument('--chunksize', type=int, help='Stream the file in chunks of this many rows (summary, aggregate, filter, clean, transform, save, visualize)')
+    parser.add_argument('--workers', type=int, default=1, help='Process the file in this many parallel byte-range partitions (same operations as --chunksize)')
+    parser.add_argument('--no-cache', action='store_true', help='Parse the CSV without reading or writing the columnar cache')
+    parser.add_argument('--cache-size', type=int, default=CACHE_LIMIT_MB, help='Cache size limit in MB; least recently used entries are evicted')
+    parser.add_argument('--all', action='store_true', help='With cache-clear, remove every cached file rather than just this one')
+    parser.add_argument('--infer-schema', action='store_true', help='Infer compact dtypes from a sample of the file before reading it')
+    parser.add_argument('--schema', type=str, help='Schema JSON file to read dtypes from; inferred and written there if it does not exist')
+    parser.add_argument('--select', nargs='+', type=str, help='Only read and output these columns (plus any the operation needs)')
+    parser.add_argument('--sort_by', nargs='+', type=str, help='Columns to sort by (overrides --column for sort)')
+    parser.add_argument('--order', nargs='+', choices=['asc', 'desc'], help='Sort direction, once for all sort columns or once per column')
+    parser.add_argument('--top', type=int, help='Only keep the first N rows of the sort order (no full sort)')
+    parser.add_argument('--temp_dir', type=str, help='Directory for sort spill files (defaults to the system temp directory)')
+    parser.add_argument('--keys', nargs='+', type=str, help='Key columns for dedupe (overrides --column)')
+    parser.add_argument('--keep', choices=['first', 'last'], default='first', help='Which duplicate to keep for dedupe')
+    parser.add_argument('--max_hashes', type=int, default=50_000_000, help='Key hashes dedupe keeps in memory before spilling to disk')
+    parser.add_argument('--bloom_error_rate', type=float, help='Dedupe with a Bloom filter at this false-positive rate (fixed memory, approximate)')
+    parser.add_argument('--expected_rows', type=int, default=100_000_000, help='Number of distinct keys the Bloom filter is sized for')
+    parser.add_argument('--spec', type=str, help='Pipeline spec file (JSON or YAML) listing the steps to run')
+    parser.add_argument('--steps', nargs='+', type=str, help='Pipeline steps as op:key=value,... (e.g. filter:column=Department,value=Sales)')
+    parser.add_argument('--sample', type=int, help='Approximate summary, aggregate or visualize from a sample of this many rows, with 95%% intervals')
+    parser.add_argument('--sample_method', choices=['block', 'reservoir'], default='block', help='block: read runs of rows at random offsets (fastest); reservoir: uniform rows from one newline scan')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for --sample')
+    parser.add_argument('--sketch', action='store_true', help='Streamed summary and pie/bar charts count text values with fixed-memory sketches (HyperLogLog, count-min) instead of exactly')
+
+    parser.add_argument('--profile', nargs='?', const='table', choices=['table', 'json'], help='Report wall/CPU time, rows/s and peak memory per stage (load, operation, save/plot) as a table or a JSON line, on stderr')
+    parser.add_argument('--profile_output', type=str, help='Append the --profile report to this file instead of stderr')
+    parser.add_argument('--cprofile', type=str, help='Write cProfile stats for the run to this file')
+    parser.add_argument('--tracemalloc', type=str, help='Trace Python allocations (adds per-stage traced peaks) and write a snapshot to this file')
+    return parser
+
+def build_serve_parser():
+    parser = argparse.ArgumentParser(prog='CSVTOOL.py serve', description='Keep datasets loaded in memory and run operations on request, one command line per request')
+    parser.add_argument('--socket', type=str, help='Listen on this Unix socket instead of reading stdin (replies are JSON lines)')
+    parser.add_argument('--port', type=int, help='Listen on this localhost TCP port instead of reading stdin (replies are JSON lines); needs a token')
+    parser.add_argument('--token_file', type=str, help=f'With --port, clients must send the token in this file (mode 0600) as their first line; default: ${SERVE_TOKEN_ENV}')
+    parser.add_argument('--json', action='store_true', help='On stdin, reply with one JSON line per request instead of plain output')
+    parser.add_argument('--max_datasets', type=int, default=SERVE_MAX_DATASETS, help='Datasets kept loaded; the least recently used is dropped first')
+    parser.add_argument('--memory_mb', type=int, default=SERVE_MEMORY_MB, help='Memory the loaded datasets may use before the least recently used are dropped')
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        serve(build_serve_parser().parse_args(argv[1:]))
+        return
+    args = build_parser().parse_args(argv)
+    if args.profile or args.cprofile or args.tracemalloc:
+        profiled_run(args, argv)
+    else:
+        run(args)
+
+def resolve_schema(args):
+    # Replaces the --schema path with the schema itself; False if it could not be inferred.
+    schema_file, args.schema = args.schema, None
+    if is_columnar(args.file) and (schema_file or args.infer_schema):
+        print("Note: columnar input already has typed columns; ignoring --schema/--infer-schema.")
+        schema_file, args.infer_schema = None, False
+    if schema_file and os.path.exists(schema_file):
+        args.schema = load_schema(schema_file)
+    elif schema_file or args.infer_schema:
+        try:
+            args.schema = infer_schema(args.file)
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            return False
+        if schema_file:
+            save_schema(args.schema, schema_file)
+    return True
 
-    args = parser.parse_args()
-    data = load_data(args.file)
+def run(args):
+    if args.plot_output and args.operation == 'visualize':
+        plotting('Agg')
+    if args.operation == 'cache-clear':
+        removed = clear_cache(None if args.all else args.file)
+        print(f"Removed {removed} cached file(s) from {CACHE_DIR}")
+        return
+    if not resolve_schema(args):
+        return
+    columns = read_columns(args.file)
+    if columns is None:
+        return
+    missing = [column for column in args.select or [] if column not in columns]
+    if missing:
+        print(f"Error: Columns {missing} not found in dataset.")
+        return
+    if args.operation == 'transform' and args.expr:
+        try:
+            parse_expression(args.expr)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+    args.schema = with_usecols(args.schema, plan_columns(args, columns))
+    if args.operation == 'index':
+        if file_format(args.file) != 'csv':
+            print("Error: index needs a plain (uncompressed) CSV file.")
+            return
+        if not args.column or args.column not in columns:
+            print("Error: index needs --column with a column of the file.")
+            return
+        try:
+            meta = build_index(args.file, args.column, args.index_type, args.schema)
+        except (OSError, ValueError) as e:
+            print(f"Error building index: {e}")
+            return
+        print(f"Built {meta['kind']} index on {args.column} ({meta['entries']} of {meta['rows']} rows) in {index_dir(args.file)}")
+        return
+    if args.operation == 'filter' and is_filter(args) and args.column in columns:
+        filtered = indexed_filter(args)
+        if filtered is not None:
+            filtered = project(filtered, args)
+            if args.output or args.chunksize or args.workers > 1:
+                deliver_rows(args, lambda handle: write_chunks([filtered], handle))
+            else:
+                print(filtered)
+            return
+    if args.operation == 'pipeline':
+        try:
+            steps = load_pipeline(args.spec) if args.spec else parse_steps(args.steps or [])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading pipeline: {e}")
+            return
+        error = validate_steps(steps) if steps else "No pipeline steps given (use --spec or --steps)."
+        error = error or check_step_columns(steps, columns)
+        if error:
+            print(f"Error: {error}")
+            return
+        run_pipeline(args, steps)
+        return
+    if args.sample:
+        if args.operation in ('summary', 'aggregate', 'visualize'):
+            run_sampled(args)
+            return
+        print(f"Sampling is not supported for '{args.operation}'; using the whole file.")
+    if args.sketch and not args.chunksize and args.operation in ('summary', 'visualize'):
+        args.chunksize = 100000
+    if args.workers > 1 and file_format(args.file) != 'csv':
+        print("Parallel execution needs a plain CSV file; using a single process.")
+        args.workers = 1
+    if args.workers > 1:
+        if args.operation in ('summary', 'aggregate', 'filter', 'clean', 'transform', 'save'):
+            run_parallel(args)
+            return
+        print(f"Parallel execution is not supported for '{args.operation}'; using a single process.")
+    if args.chunksize:
+        if args.operation == 'sort' and (args.sort_by or args.column):
+            if check_columns(args, read_columns(args.file, args.schema)):
+                run_streaming_sort(args)
+            return
+        if args.operation == 'dedupe' and (args.keys or args.column):
+            if check_columns(args, read_columns(args.file, args.schema)):
+                run_dedupe(args)
+            return
+        if args.operation == 'visualize' and args.column and args.visualization:
+            run_streaming_plot(args)
+            return
+        if args.operation in ('summary', 'aggregate', 'filter', 'clean', 'transform', 'save'):
+            run_streaming(args)
+            return
+        print(f"Streaming is not supported for '{args.operation}'; loading the whole file.")
+    if args.operation == 'filter' and is_filter(args):
+        if args.column not in columns:
+            print("Column not found in dataset.")
+            return
+        filtered = load_filtered(args.file, args.column, args.value, args.schema, use_cache=not args.no_cache,
+                                 low=args.min_value, high=args.max_value)
+        if filtered is not None:
+            filtered = project(filtered, args)
+            # Same delivery as the indexed path, so --output works whether or not an index is used.
+            if args.output:
+                deliver_rows(args, lambda handle: write_chunks([filtered], handle))
+            else:
+                print(filtered)
+        return
+    data = load_data(args.file, use_cache=not args.no_cache, cache_limit_mb=args.cache_size, schema=args.schema)
 
     if data is not None:
         if args.operation == 'summary':
             summary_statistics(data)
         elif args.operation == 'visualize' and args.column and args.visualization:
-            if args.visualization == 'hist':
-                plot_histogram(data, args.column)
-            elif args.visualization == 'pie':
-                plot_pie_chart(data, args.column)
-            elif args.visualization == 'bar':
-                plot_bar_chart(data, args.column)
-            elif args.visualization == 'line':
-                plot_line_graph(data, args.column)
-        elif args.operation == 'filter' and args.column and args.value:
-            print(filter_data(data, args.column, args.value))
-        elif args.operation == 'sort' and args.column:
-            print(sort_data(data, args.column))
+            visualize(data, args)
+        elif args.operation == 'sort' and (args.sort_by or args.column):
+            by, ascending = sort_order(args)
+            if len(ascending) != len(by):
+                print("Error: --order needs one direction, or one per sort column.")
+                return
+            sorted_data = project(sort_data(data, by, ascending, args.top), args)
+            if args.output:
+                save_data(sorted_data, args.output, args.format)
+            else:
+                print(sorted_data)
         elif args.operation == 'clean' and args.action:
-            cleaned_data = handle_missing_data(data, args.action, args.fill_value)
+            cleaned_data = project(handle_missing_data(data, args.action, args.fill_value), args)
             if args.modify:
                 save_data(cleaned_data, args.file)  
             if args.output:
-                save_data(cleaned_data, args.output)  
+                save_data(cleaned_data, args.output, args.format)  
             if args.show:
                 print("Cleaned Data:\n", cleaned_data)  
         elif args.operation == 'aggregate' and args.groupby and args.aggregation:
             print(aggregate_data(data, args.groupby, args.aggregation))
-        elif args.operation == 'transform' and args.new_column and args.math_operation and args.columns:
-            print(transform_data(data, args.new_column, args.math_operation, args.columns))
+        elif args.operation == 'transform' and is_transform(args):
+            if args.output:
+                try:
+                    transformed = apply_row_operation(data, args)
+                except RowOperationError as e:
+                    print(f"Error: {e}. Nothing was saved.")
+                    return
+                save_data(transformed, args.output, args.format)
+            else:
+                print(project(run_transform(data, args), args))
         elif args.operation == 'save' and args.output:
-            save_data(data, args.output)
+            save_data(project(data, args), args.output, args.format)
+        elif args.operation == 'dedupe' and (args.keys or args.column):
+            deduped = project(remove_duplicates(data, args.keys or args.column, args.keep), args)
+            if args.output:
+                save_data(deduped, args.output, args.format)
+            else:
+                print(deduped)
 
 if __name__ == '__main__':
     main()
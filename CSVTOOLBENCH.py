@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+GENERATE_CHUNK_ROWS = 100000
+
+OPERATIONS = {
+    'save': ['save', '--output', '{out}'],
+    'summary': ['summary'],
+    'filter': ['filter', '--column', 'text_0', '--value', 'v1', '--output', '{out}'],
+    'sort': ['sort', '--column', 'float_0', '--output', '{out}'],
+    'aggregate': ['aggregate', '--groupby', 'text_0', '--aggregation', 'mean'],
+    'clean': ['clean', '--action', 'fill', '--fill_value', 'mean', '--output', '{out}'],
+    'transform': ['transform', '--new_column', 'ratio', '--math_operation', 'add', '--columns', 'float_0', 'int_0', '--output', '{out}'],
+    'dedupe': ['dedupe', '--column', 'int_0', '--output', '{out}'],
+}
+
+MODES = {
+    'memory': ['--no-cache'],
+    # The input is parsed into the Feather cache by an unmeasured summary run first.
+    'cached': [],
+    'stream': ['--chunksize', '100000'],
+    'workers': ['--workers', str(os.cpu_count() or 1), '--chunksize', '100000'],
+}
+
+def generate_chunk(rng, rows, start, int_columns, float_columns, text_columns, date_columns, null_ratio, cardinality):
+    columns = {'id': np.arange(start, start + rows)}
+    for i in range(int_columns):
+        columns[f'int_{i}'] = rng.integers(0, max(cardinality, 2), rows)
+    for i in range(float_columns):
+        values = rng.normal(1000, 250, rows)
+        values[rng.random(rows) < null_ratio] = np.nan
+        columns[f'float_{i}'] = values
+    for i in range(text_columns):
+        values = pd.Series(rng.integers(0, cardinality, rows)).map(lambda v: f'v{v}')
+        values[rng.random(rows) < null_ratio] = None
+        columns[f'text_{i}'] = values
+    for i in range(date_columns):
+        seconds = rng.integers(0, 365 * 24 * 3600, rows)
+        columns[f'date_{i}'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(seconds, unit='s')
+    return pd.DataFrame(columns)
+
+def generate_csv(output_file, rows, int_columns=2, float_columns=2, text_columns=2, date_columns=1,
+                 null_ratio=0.01, cardinality=100, seed=0):
+    # Fixed chunk size and one generator stream, so the same arguments always give the same bytes.
+    rng = np.random.default_rng(seed)
+    with open(output_file, 'w', newline='') as handle:
+        for start in range(0, rows, GENERATE_CHUNK_ROWS):
+            count = min(GENERATE_CHUNK_ROWS, rows - start)
+            chunk = generate_chunk(rng, count, start, int_columns, float_columns, text_columns, date_columns,
+                                   null_ratio, cardinality)
+            chunk.to_csv(handle, header=start == 0, index=False)
+    return output_file
+
+def _measure(argv, connection, cache_dir):
+    os.environ['CSVTOOL_CACHE_DIR'] = cache_dir
+    import CSVTOOL
+    baseline = CSVTOOL.peak_rss_mb()
+    sys.argv = ['CSVTOOL.py'] + argv
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            CSVTOOL.main()
+        error = None
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    connection.send({'seconds': time.perf_counter() - wall, 'cpu_seconds': time.process_time() - cpu,
+                     'peak_rss_mb': CSVTOOL.peak_rss_mb(), 'baseline_rss_mb': baseline, 'error': error})
+    connection.close()
+
+def measure(argv, cache_dir, profile_file):
+    # A fresh interpreter per case, so peak RSS belongs to that case alone; --profile json splits
+    # the time into the load, operation and save stages.
+    if os.path.exists(profile_file):
+        os.remove(profile_file)
+    argv = argv + ['--profile', 'json', '--profile_output', profile_file]
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(argv, sender, cache_dir))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'seconds': None, 'cpu_seconds': None, 'peak_rss_mb': None, 'baseline_rss_mb': None,
+                  'error': 'worker exited'}
+    process.join()
+    result['stages'] = []
+    if os.path.exists(profile_file):
+        with open(profile_file) as handle:
+            lines = handle.read().splitlines()
+        if lines:
+            result['stages'] = json.loads(lines[-1])['stages']
+    return result
+
+def stage_seconds(record):
+    return '  '.join(f"{stage['stage']} {stage['wall_s']:.3f}s" for stage in record['stages'])
+
+def run_benchmarks(sizes, operations, modes, work_dir, repeat=1, **generate_options):
+    results = []
+    cache_dir = os.path.join(work_dir, 'cache')
+    profile_file = os.path.join(work_dir, 'profile.jsonl')
+    for rows in sizes:
+        input_file = os.path.join(work_dir, f'bench_{rows}.csv')
+        generate_csv(input_file, rows, **generate_options)
+        size_bytes = os.path.getsize(input_file)
+        if 'cached' in modes:
+            measure([input_file, 'summary'], cache_dir, profile_file)
+        for operation in operations:
+            for mode in modes:
+                argv = [input_file] + [part.format(out=os.path.join(work_dir, 'out.csv')) for part in OPERATIONS[operation]]
+                argv += MODES[mode]
+                runs = [measure(argv, cache_dir, profile_file) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run['seconds'] if run['seconds'] is not None else float('inf'))
+                record = {'operation': operation, 'mode': mode, 'rows': rows, 'bytes': size_bytes, **best}
+                if best['seconds']:
+                    record['rows_per_s'] = rows / best['seconds']
+                    record['mb_per_s'] = size_bytes / (1024 * 1024) / best['seconds']
+                results.append(record)
+                print(f"{operation:>10} {mode:>8} {rows:>12} rows  {record['seconds'] or 0:8.3f}s  "
+                      f"{record.get('peak_rss_mb') or 0:8.1f} MB  {stage_seconds(record)}"
+                      f"{'  ' + best['error'] if best['error'] else ''}",
+                      file=sys.stderr)
+    return results
+
+def environment():
+    return {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def add_generate_options(parser):
+    parser.add_argument('--int_columns', type=int, default=2, help='Number of integer columns')
+    parser.add_argument('--float_columns', type=int, default=2, help='Number of float columns')
+    parser.add_argument('--text_columns', type=int, default=2, help='Number of text columns')
+    parser.add_argument('--date_columns', type=int, default=1, help='Number of datetime columns')
+    parser.add_argument('--null_ratio', type=float, default=0.01, help='Fraction of missing values in float and text columns')
+    parser.add_argument('--cardinality', type=int, default=100, help='Distinct values in integer and text columns')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+def generate_options(args):
+    return {'int_columns': args.int_columns, 'float_columns': args.float_columns, 'text_columns': args.text_columns,
+            'date_columns': args.date_columns, 'null_ratio': args.null_ratio, 'cardinality': args.cardinality,
+            'seed': args.seed}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for the CLI Data Analysis Tool')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Write a reproducible synthetic CSV file')
+    generate.add_argument('output', help='Path of the CSV file to write')
+    generate.add_argument('--rows', type=int, default=1000000, help='Number of rows')
+    add_generate_options(generate)
+
+    run = commands.add_parser('run', help='Time every operation across input sizes and modes')
+    run.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000, 1000000], help='Row counts to benchmark')
+    run.add_argument('--operations', nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS), help='Operations to time')
+    run.add_argument('--modes', nargs='+', choices=list(MODES), default=['memory', 'stream'], help='Execution modes to compare')
+    run.add_argument('--repeat', type=int, default=1, help='Runs per case; the fastest is reported')
+    run.add_argument('--work_dir', type=str, help='Directory for generated inputs and outputs (default: a temp directory)')
+    run.add_argument('--output', type=str, help='Write the JSON report here instead of stdout')
+    add_generate_options(run)
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        generate_csv(args.output, args.rows, **generate_options(args))
+        print(f"Generated {args.rows} rows in {args.output}")
+        return
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        results = run_benchmarks(args.sizes, args.operations, args.modes, work_dir, args.repeat, **generate_options(args))
+    report = json.dumps({'environment': environment(), 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(report)
+        print(f"Benchmark report saved to {args.output}")
+    else:
+        print(report)
+
+if __name__ == '__main__':
+    main()
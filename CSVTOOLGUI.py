@@ -1,14 +1,186 @@
+import os
+import queue
+import threading
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from tkinter.ttk import Combobox
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from CSVTOOL import (read_cache, write_cache, parse_expression, evaluate_expression, column_range, plot_stats, plot_histogram, plot_pie_chart,
+                     plot_bar_chart, plot_line_graph)
+
+POLL_MS = 100
+LOAD_CHUNK_ROWS = 200000
+VIEW_ROWS = 30
+FILTER_OPERATORS = ('>=', '<=', '!=', '>', '<', '=')
+
+class TaskCancelled(Exception):
+    pass
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.1f} {unit}" if unit != "B" else f"{count} B"
+        count /= 1024
+
+def load_in_background(file_path, progress, cancelled):
+    data = read_cache(file_path)
+    if data is not None:
+        progress(rows=len(data))
+        return data
+    total = os.path.getsize(file_path)
+    parts = []
+    rows = 0
+    with open(file_path, "rb") as handle:
+        for chunk in pd.read_csv(handle, chunksize=LOAD_CHUNK_ROWS):
+            if cancelled.is_set():
+                raise TaskCancelled()
+            parts.append(chunk)
+            rows += len(chunk)
+            progress(bytes_read=handle.tell(), total_bytes=total, rows=rows)
+    data = pd.concat(parts) if parts else pd.read_csv(file_path)
+    write_cache(file_path, data)
+    return data
+
+def filter_mask(series, text):
+    # "value" or "=value" matches exactly; numeric columns also accept >, <, >=, <= and !=.
+    operator = next((op for op in FILTER_OPERATORS if text.startswith(op)), '=')
+    value = text[len(operator):].strip() if text.startswith(operator) else text.strip()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        value = float(value)
+    elif operator not in ('=', '!='):
+        raise ValueError(f"'{operator}' needs a numeric column.")
+    else:
+        series = series.astype(str)
+    comparisons = {'>=': series.ge, '<=': series.le, '!=': series.ne, '>': series.gt, '<': series.lt, '=': series.eq}
+    return comparisons[operator](value).to_numpy()
+
+class DataViewer(tk.Toplevel):
+    # Only the visible window of rows is ever turned into Treeview items; the scrollbar maps onto the
+    # full row count. Sorting and filtering keep an array of row positions into the original frame.
+    def __init__(self, master, title, data):
+        super().__init__(master)
+        self.title(title)
+        self.configure(bg='#121212')
+        self.data = data
+        self.positions = None
+        self.offset = 0
+        self.sort_column = None
+        self.ascending = True
+        self.filters = []
+
+        self.columns = ['#'] + [str(column) for column in data.columns]
+        self.tree = ttk.Treeview(self, columns=self.columns, show='headings', height=VIEW_ROWS, selectmode='browse')
+        for i, column in enumerate(self.columns):
+            self.tree.heading(column, text=column, command=lambda i=i: self.sort_by(i))
+            self.tree.column(column, width=80 if i == 0 else 120, stretch=i > 0, anchor='w')
+        self.tree.bind('<Button-3>', self.filter_from_header)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_rows(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_rows(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_rows(1, 'units'))
+        for key, amount, what in (('<Up>', -1, 'units'), ('<Down>', 1, 'units'),
+                                  ('<Prior>', -1, 'pages'), ('<Next>', 1, 'pages')):
+            self.bind(key, lambda event, amount=amount, what=what: self.scroll_rows(amount, what))
+        self.bind('<Home>', lambda event: self.show_rows(0))
+        self.bind('<End>', lambda event: self.show_rows(self.row_count()))
+
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scroll)
+        self.xscrollbar = ttk.Scrollbar(self, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.xscrollbar.set)
+        self.status = tk.Label(self, anchor='w', font=('Segoe UI', 10), fg="#00c8ff", bg="#121212")
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.xscrollbar.grid(row=1, column=0, sticky='ew')
+        self.status.grid(row=2, column=0, columnspan=2, sticky='ew', padx=5)
+        self.columnconfigure(0, weight=1)
+        self.show_rows(0)
+
+    def row_count(self):
+        return len(self.data) if self.positions is None else len(self.positions)
+
+    def show_rows(self, offset):
+        total = self.row_count()
+        self.offset = max(0, min(offset, total - VIEW_ROWS))
+        window = slice(self.offset, self.offset + VIEW_ROWS)
+        rows = self.data.iloc[window] if self.positions is None else self.data.iloc[self.positions[window]]
+        self.tree.delete(*self.tree.get_children())
+        for label, values in zip(rows.index, rows.itertuples(index=False, name=None)):
+            self.tree.insert('', 'end', values=[label] + ['' if pd.isna(value) else value for value in values])
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + VIEW_ROWS) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        shown = f"rows {self.offset + 1:,}-{min(self.offset + VIEW_ROWS, total):,} of {total:,}" if total else "no rows"
+        if self.filters:
+            shown += f" (filtered from {len(self.data):,}: {'; '.join(self.filters)})"
+        self.status.config(text=shown)
+
+    def on_scroll(self, action, amount, what=None):
+        if action == 'moveto':
+            self.show_rows(int(float(amount) * self.row_count()))
+        else:
+            self.scroll_rows(int(amount), what)
+
+    def scroll_rows(self, amount, what):
+        self.show_rows(self.offset + amount * (VIEW_ROWS if what == 'pages' else 1))
+
+    def column_values(self, i):
+        series = self.data.index.to_series() if i == 0 else self.data.iloc[:, i - 1]
+        series = series.reset_index(drop=True)
+        return series if self.positions is None else series.iloc[self.positions].reset_index(drop=True)
+
+    def current_positions(self):
+        return np.arange(len(self.data)) if self.positions is None else self.positions
+
+    def sort_by(self, i):
+        self.ascending = not self.ascending if self.sort_column == i else True
+        try:
+            order = self.column_values(i).sort_values(ascending=self.ascending, kind='stable',
+                                                      na_position='last').index.to_numpy()
+        except TypeError as e:
+            messagebox.showerror("Error", f"Cannot sort {self.columns[i]}: {e}", parent=self)
+            return
+        self.positions = self.current_positions()[order]
+        for j, column in enumerate(self.columns):
+            arrow = (' \u25b2' if self.ascending else ' \u25bc') if j == i else ''
+            self.tree.heading(column, text=column + arrow)
+        self.sort_column = i
+        self.show_rows(0)
+
+    def filter_from_header(self, event):
+        if self.tree.identify_region(event.x, event.y) != 'heading':
+            return
+        i = int(self.tree.identify_column(event.x).lstrip('#')) - 1
+        text = simpledialog.askstring("Filter", f"Show rows where {self.columns[i]} is\n"
+                                      "(value, or >, <, >=, <=, != value; leave empty to clear filters)", parent=self)
+        if text is None:
+            return
+        if not text.strip():
+            self.positions = None
+            self.filters = []
+            self.sort_column = None
+            for column in self.columns:
+                self.tree.heading(column, text=column)
+        else:
+            try:
+                mask = filter_mask(self.column_values(i), text.strip())
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid filter: {e}", parent=self)
+                return
+            self.positions = self.current_positions()[mask]
+            self.filters.append(f"{self.columns[i]} {text.strip()}")
+        self.show_rows(0)
 
 class CSVToolApp:
     def __init__(self, root):
         self.root = root
         self.root.title("CSV Tool")
         self.data = None
+        self.task = None
+        self.on_done = None
+        self.cancel_event = threading.Event()
+        self.results = queue.Queue()
         self.root.configure(bg='#121212')
 
         # Set the window size
@@ -124,8 +296,18 @@ class CSVToolApp:
         self.new_column_entry.grid(row=0, column=1, padx=10, sticky="w")
 
         # Action button section
-        self.run_button = tk.Button(self.root, text="Run Operation", command=self.run_operation, font=('Segoe UI', 12), bg="#00c8ff", fg="white", relief="flat")
-        self.run_button.grid(row=9, column=0, padx=20, pady=20, columnspan=2)
+        self.action_buttons_frame = tk.Frame(self.root, bg="#121212")
+        self.action_buttons_frame.grid(row=9, column=0, padx=20, pady=20, columnspan=2)
+
+        self.run_button = tk.Button(self.action_buttons_frame, text="Run Operation", command=self.run_operation, font=('Segoe UI', 12), bg="#00c8ff", fg="white", relief="flat")
+        self.run_button.grid(row=0, column=0, padx=10)
+
+        self.cancel_button = tk.Button(self.action_buttons_frame, text="Cancel", command=self.cancel_task, font=('Segoe UI', 12), bg="#1e1e1e", fg="white", relief="flat", state="disabled")
+        self.cancel_button.grid(row=0, column=1, padx=10)
+
+        # Progress / status line
+        self.status_label = tk.Label(self.root, text="Ready", font=('Segoe UI', 10), fg="#00c8ff", bg="#121212", anchor="w")
+        self.status_label.grid(row=10, column=0, padx=20, sticky="ew")
 
     def update_ui_based_on_operation(self, event):
         # Enable/Disable widgets based on selected operation
@@ -156,19 +338,96 @@ class CSVToolApp:
             self.fill_value_entry.grid(row=1, column=1, padx=10, sticky="w")
             self.value_combobox.grid_forget()
 
+    def start_task(self, description, work, on_done):
+        # Runs work(progress, cancelled) on a worker thread; on_done(result) runs back on the Tk thread.
+        if self.task is not None:
+            messagebox.showwarning("Busy", "Another operation is still running.")
+            return
+        self.cancel_event = threading.Event()
+        self.on_done = on_done
+        self.task = threading.Thread(target=self._run_task, args=(work, self.cancel_event), daemon=True)
+        self.set_busy(True, description)
+        self.task.start()
+        self.root.after(POLL_MS, self.poll_results)
+
+    def _run_task(self, work, cancelled):
+        try:
+            result = work(lambda **progress: self.results.put(("progress", progress)), cancelled)
+            self.results.put(("cancelled" if cancelled.is_set() else "done", result))
+        except TaskCancelled:
+            self.results.put(("cancelled", None))
+        except Exception as e:
+            self.results.put(("error", e))
+
+    def poll_results(self):
+        while True:
+            try:
+                kind, payload = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.show_progress(payload)
+                continue
+            self.finish_task(kind, payload)
+            return
+        self.root.after(POLL_MS, self.poll_results)
+
+    def finish_task(self, kind, payload):
+        on_done = self.on_done
+        self.task = None
+        self.on_done = None
+        self.set_busy(False, "Ready")
+        if kind == "done":
+            on_done(payload)
+        elif kind == "cancelled":
+            self.status_label.config(text="Cancelled")
+        else:
+            self.status_label.config(text="Failed")
+            messagebox.showerror("Error", str(payload))
+
+    def show_progress(self, progress):
+        parts = []
+        if "bytes_read" in progress:
+            parts.append(f"{format_bytes(progress['bytes_read'])} of {format_bytes(progress['total_bytes'])} read")
+        if "rows" in progress:
+            parts.append(f"{progress['rows']:,} rows processed")
+        self.status_label.config(text=", ".join(parts))
+
+    def set_busy(self, busy, text):
+        self.run_button.config(state="disabled" if busy else "normal")
+        self.browse_button.config(state="disabled" if busy else "normal")
+        self.cancel_button.config(state="normal" if busy else "disabled")
+        self.status_label.config(text=text)
+
+    def cancel_task(self):
+        # Chunked work stops at the next chunk; a single pandas call finishes and its result is dropped.
+        if self.task is not None:
+            self.cancel_event.set()
+            self.status_label.config(text="Cancelling...")
+
     def browse_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
         if file_path:
             self.file_entry.delete(0, tk.END)
             self.file_entry.insert(0, file_path)
-            self.data = pd.read_csv(file_path)
+            self.start_task(f"Loading {os.path.basename(file_path)}...",
+                            lambda progress, cancelled: load_in_background(file_path, progress, cancelled),
+                            self.data_loaded)
+
+    def data_loaded(self, data):
+        self.data = data
+        self.status_label.config(text=f"Loaded {len(data):,} rows, {len(data.columns)} columns")
 
-            # Update comboboxes with actual columns from the file
-            columns = ["None"] + list(self.data.columns)
-            self.column_combobox['values'] = columns
-            self.value_combobox['values'] = columns
+        # Update comboboxes with actual columns from the file
+        columns = ["None"] + list(self.data.columns)
+        self.column_combobox['values'] = columns
+        self.value_combobox['values'] = columns
 
     def run_operation(self):
+        if self.task is not None:
+            messagebox.showwarning("Busy", "Another operation is still running.")
+            return
+
         if self.data is None or self.data.empty:
             messagebox.showerror("Error", "No data loaded.")
             return
@@ -183,7 +442,7 @@ class CSVToolApp:
         if operation == "summary":
             self.show_summary()
         elif operation == "visualize":
-            self.visualize_data(visualization_type)
+            self.visualize_data(column, visualization_type)
         elif operation == "filter":
             self.filter_data(column, value)
         elif operation == "sort":
@@ -197,50 +456,71 @@ class CSVToolApp:
         elif operation == "save":
             self.save_data()
 
+    def run_in_background(self, description, compute, on_done):
+        data = self.data
+
+        def work(progress, cancelled):
+            result = compute(data)
+            progress(rows=len(data))
+            return result
+        self.start_task(description, work, on_done)
+
     def show_summary(self):
-        summary = self.data.describe(include="all")
-        messagebox.showinfo("Data Summary", str(summary))
+        self.run_in_background("Computing summary...", lambda data: data.describe(include="all"),
+                               lambda summary: DataViewer(self.root, "Data Summary", summary))
 
-    def visualize_data(self, visualization_type):
-        if visualization_type == "hist":
-            self.data.hist()
-        elif visualization_type == "pie":
-            self.data.plot.pie(subplots=True, figsize=(10, 6))
-        elif visualization_type == "bar":
-            self.data.plot.bar(figsize=(10, 6))
-        elif visualization_type == "line":
-            self.data.plot.line(figsize=(10, 6))
+    def visualize_data(self, column, visualization_type):
+        if column == "None" or visualization_type == "None":
+            messagebox.showerror("Error", "Please select a column and a visualization type.")
+            return
+
+        numeric = pd.api.types.is_numeric_dtype(self.data[column])
+        if visualization_type == "line" and not numeric:
+            messagebox.showerror("Error", f"Column {column} is not numeric, cannot plot a line graph.")
+            return
 
-        plt.show()
+        def compute(data):
+            value_range = column_range([data], column) if visualization_type == "hist" and numeric else None
+            return plot_stats([data], visualization_type, column, value_range)
+
+        # Binning, counting and decimation run on the worker; matplotlib has to draw on the Tk thread.
+        plots = {"hist": plot_histogram, "pie": plot_pie_chart, "bar": plot_bar_chart, "line": plot_line_graph}
+        self.run_in_background("Preparing plot...", compute,
+                               lambda stats: plots[visualization_type](self.data, column, stats=stats))
 
     def filter_data(self, column, value):
         if column == "None" or value == "None":
             messagebox.showerror("Error", "Please select both a column and value to filter.")
             return
 
-        filtered_data = self.data[self.data[column] == value]
-        self.show_output(filtered_data)
+        self.run_in_background("Filtering...", lambda data: data[data[column] == value], self.show_output)
 
     def sort_data(self, column):
         if column == "None":
             messagebox.showerror("Error", "Please select a column to sort.")
             return
 
-        sorted_data = self.data.sort_values(by=column)
-        self.show_output(sorted_data)
+        self.run_in_background("Sorting...", lambda data: data.sort_values(by=column), self.show_output)
 
     def clean_data(self, column, aggregation_func, fill_value):
         if column == "None":
             messagebox.showerror("Error", "Please select a column to clean.")
             return
 
-        if fill_value:
-            self.data[column].fillna(fill_value, inplace=True)
-        else:
-            if aggregation_func != "None":
-                self.data[column] = self.data[column].apply(lambda x: aggregation_func)
-            self.data[column].dropna(inplace=True)
-
+        # Work on a shallow copy; self.data is only replaced back on the Tk thread.
+        def compute(data):
+            data = data.copy(deep=False)
+            if fill_value:
+                data[column] = data[column].fillna(fill_value)
+            else:
+                if aggregation_func != "None":
+                    data[column] = aggregation_func
+                data = data.dropna(subset=[column])
+            return data
+        self.run_in_background("Cleaning...", compute, self.data_changed)
+
+    def data_changed(self, data):
+        self.data = data
         self.show_output(self.data)
 
     def aggregate_data(self, column, aggregation_func):
@@ -252,28 +532,46 @@ class CSVToolApp:
             messagebox.showerror("Error", "Please select an aggregation function.")
             return
 
-        aggregated_data = self.data.groupby(column).agg(aggregation_func)
-        self.show_output(aggregated_data)
+        self.run_in_background("Aggregating...", lambda data: data.groupby(column).agg(aggregation_func), self.show_output)
 
     def transform_data(self, column):
-        if column == "None":
-            messagebox.showerror("Error", "Please select a column to transform.")
+        # The New Column entry takes a name (doubles the selected column) or a full "name = expression".
+        new_column = self.new_column_entry.get().strip()
+        if "=" in new_column:
+            expression = new_column
+        else:
+            if column == "None":
+                messagebox.showerror("Error", "Please select a column to transform.")
+                return
+            if not new_column:
+                messagebox.showerror("Error", "Please enter a new column name or an expression.")
+                return
+            expression = f"`{new_column}` = `{column}` * 2"
+
+        try:
+            parse_expression(expression)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
 
-        new_column = self.new_column_entry.get()
-        if new_column:
-            self.data[new_column] = self.data[column].apply(lambda x: x * 2)  # Example transformation
-        self.show_output(self.data)
+        def compute(data):
+            target, result = evaluate_expression(data, expression, zero_division="nan")
+            data = data.copy(deep=False)
+            data[target] = result
+            return data
+        self.run_in_background("Transforming...", compute, self.data_changed)
 
     def show_output(self, output_data):
+        self.status_label.config(text=f"Done: {len(output_data):,} rows")
         if self.show_output_var.get():
-            messagebox.showinfo("Data Output", str(output_data))
+            DataViewer(self.root, "Data Output", output_data)
 
     def save_data(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
         if file_path:
-            self.data.to_csv(file_path, index=False)
-            messagebox.showinfo("Data Saved", f"Data saved to {file_path}")
+            self.run_in_background(f"Saving {os.path.basename(file_path)}...",
+                                   lambda data: data.to_csv(file_path, index=False),
+                                   lambda result: messagebox.showinfo("Data Saved", f"Data saved to {file_path}"))
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Keep the Feather cache out of the home directory.
+    import CSVTOOL
+    monkeypatch.setattr(CSVTOOL, 'CACHE_DIR', str(tmp_path / 'cache'))
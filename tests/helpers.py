@@ -0,0 +1,10 @@
+import CSVTOOL
+
+
+def write_csv(path, data):
+    data.to_csv(path, index=False)
+    return str(path)
+
+
+def run_tool(*argv):
+    CSVTOOL.main([str(arg) for arg in argv])
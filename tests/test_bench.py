@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+
+import CSVTOOLBENCH
+
+
+def test_generate_csv_is_reproducible(tmp_path, monkeypatch):
+    # Small generator chunks, so the same bytes also have to come out across chunk boundaries.
+    monkeypatch.setattr(CSVTOOLBENCH, 'GENERATE_CHUNK_ROWS', 300)
+    first = CSVTOOLBENCH.generate_csv(tmp_path / 'first.csv', 1000, seed=3)
+    second = CSVTOOLBENCH.generate_csv(tmp_path / 'second.csv', 1000, seed=3)
+    other = CSVTOOLBENCH.generate_csv(tmp_path / 'other.csv', 1000, seed=4)
+    assert open(first, 'rb').read() == open(second, 'rb').read()
+    assert open(first, 'rb').read() != open(other, 'rb').read()
+    data = pd.read_csv(first)
+    assert len(data) == 1000 and data['id'].tolist() == list(range(1000))
+    assert list(data.columns) == ['id', 'int_0', 'int_1', 'float_0', 'float_1', 'text_0', 'text_1', 'date_0']
+
+
+def test_benchmark_records_profile_stages(tmp_path):
+    results = CSVTOOLBENCH.run_benchmarks([2000], ['filter'], ['memory', 'cached'], str(tmp_path))
+    assert [(record['mode'], record['error']) for record in results] == [('memory', None), ('cached', None)]
+    for record in results:
+        stages = {stage['stage']: stage for stage in record['stages']}
+        assert list(stages) == ['load', 'filter', 'save']
+        assert stages['load']['rows'] == 2000
+    assert os.listdir(tmp_path / 'cache')
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+def cache_files():
+    if not os.path.isdir(CSVTOOL.CACHE_DIR):
+        return []
+    return sorted(name for name in os.listdir(CSVTOOL.CACHE_DIR) if name != 'index.json')
+
+
+@pytest.fixture
+def source(tmp_path):
+    return write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': np.arange(1000.0), 'b': ['x', 'y'] * 500}))
+
+
+def test_second_load_reads_the_cache(source, monkeypatch):
+    first = CSVTOOL.load_data(source, use_cache=True)
+    assert len(cache_files()) == 1
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("the CSV was parsed again")
+    monkeypatch.setattr(pd, 'read_csv', no_parse)
+    pd.testing.assert_frame_equal(CSVTOOL.load_data(source, use_cache=True), first)
+
+
+def test_changed_file_invalidates_the_entry(source):
+    CSVTOOL.load_data(source, use_cache=True)
+    with open(source, 'a') as handle:
+        handle.write('1000.0,z\n')
+    assert CSVTOOL.read_cache(source) is None
+    assert cache_files() == []
+    assert CSVTOOL.load_data(source, use_cache=True)['b'].iloc[-1] == 'z'
+
+
+def test_same_size_edit_is_caught_by_the_content_hash(source):
+    CSVTOOL.load_data(source, use_cache=True)
+    text = open(source).read()
+    with open(source, 'w') as handle:
+        handle.write(text.replace('999.0,y', '999.0,q'))
+    os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 10 ** 9))
+    assert CSVTOOL.read_cache(source) is None
+
+
+def test_touch_without_change_keeps_the_entry(source, monkeypatch):
+    CSVTOOL.load_data(source, use_cache=True)
+    mtime_ns = os.stat(source).st_mtime_ns + 10 ** 9
+    os.utime(source, ns=(mtime_ns, mtime_ns))
+    assert CSVTOOL.read_cache(source) is not None
+    # The new mtime is recorded, so the next read skips the content hash.
+    monkeypatch.setattr(CSVTOOL, 'content_hash', lambda path: pytest.fail("hashed the file again"))
+    assert CSVTOOL.read_cache(source) is not None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    data = pd.DataFrame({'a': np.arange(2000.0)})
+    first, second = write_csv(tmp_path / 'first.csv', data), write_csv(tmp_path / 'second.csv', data)
+    limit_mb = 1.5 * data.memory_usage(deep=True).sum() / (1024 * 1024)
+    CSVTOOL.write_cache(first, data, limit_mb)
+    CSVTOOL.write_cache(second, data, limit_mb)
+    assert CSVTOOL.read_cache(first) is None
+    assert CSVTOOL.read_cache(second) is not None
+    assert len(cache_files()) == 1
+
+
+def test_file_larger_than_the_limit_is_not_written_or_hashed(source, monkeypatch):
+    monkeypatch.setattr(CSVTOOL, 'content_hash', lambda path: pytest.fail("hashed an uncacheable file"))
+    run_tool(source, 'summary', '--cache-size', 0)
+    assert cache_files() == []
+
+
+def test_cache_clear(tmp_path, source, capsys):
+    other = write_csv(tmp_path / 'other.csv', pd.DataFrame({'a': [1, 2]}))
+    CSVTOOL.load_data(source, use_cache=True)
+    CSVTOOL.load_data(other, use_cache=True)
+    run_tool(source, 'cache-clear')
+    assert CSVTOOL.read_cache(source) is None
+    assert CSVTOOL.read_cache(other) is not None
+    run_tool(other, 'cache-clear', '--all')
+    assert cache_files() == []
+    assert 'Removed 1 cached file(s)' in capsys.readouterr().out
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+def test_hash_set_spills_and_still_finds_keys(tmp_path):
+    seen = CSVTOOL.HashSet(max_hashes=100, temp_dir=str(tmp_path))
+    hashes = np.arange(1000, dtype=np.uint64) * np.uint64(7919)
+    try:
+        for start in range(0, 1000, 50):
+            seen.add(hashes[start:start + 50])
+        assert seen.spill_files
+        assert len(seen) == 1000
+        assert seen.contains(hashes).all()
+        assert not seen.contains(hashes + np.uint64(1)).any()
+    finally:
+        seen.close()
+    assert not os.listdir(tmp_path)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = CSVTOOL.BloomFilter(10000, error_rate=0.01)
+    rng = np.random.default_rng(3)
+    hashes = rng.integers(0, 2 ** 63, 10000, dtype=np.uint64)
+    bloom.add(hashes)
+    assert bloom.contains(hashes).all()
+    others = rng.integers(0, 2 ** 63, 10000, dtype=np.uint64)
+    assert bloom.contains(others).mean() < 0.03
+
+
+def test_dedupe_chunks_match_drop_duplicates():
+    data = pd.DataFrame({'k': [1, 2, 1, np.nan, 3, 2, np.nan], 'v': range(7)})
+    seen = CSVTOOL.HashSet()
+    # An integer key in one chunk must match the same key read as a float in another.
+    chunks = [data.iloc[:3].astype({'k': 'Int64'}), data.iloc[3:]]
+    result = pd.concat(CSVTOOL.dedupe_chunk(chunk, 'k', seen) for chunk in chunks)
+    assert result['v'].tolist() == data.drop_duplicates('k')['v'].tolist()
+
+
+def test_dedupe_keep_last_matches_drop_duplicates(tmp_path):
+    rng = np.random.default_rng(4)
+    data = pd.DataFrame({'k': rng.integers(0, 30, 200), 'j': rng.integers(0, 2, 200), 'v': np.arange(200)})
+    source = write_csv(tmp_path / 'in.csv', data)
+    result = pd.concat(CSVTOOL.dedupe_keep_last(source, ['k', 'j'], CSVTOOL.HashSet(), 16, temp_dir=str(tmp_path)))
+    assert result['v'].tolist() == data.drop_duplicates(['k', 'j'], keep='last')['v'].tolist()
+
+
+def test_pipeline_dedupe_keep_last(tmp_path, capsys):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'k': [1, 2, 1, 2, 3], 'v': range(5)}))
+    output = tmp_path / 'out.csv'
+    run_tool(source, 'pipeline', '--steps', 'dedupe:column=k,keep=last', f'save:output={output}', '--no-cache')
+    assert pd.read_csv(output)['v'].tolist() == [2, 3, 4]
+    run_tool(source, 'pipeline', '--steps', 'dedupe:column=k,keep=last', '--chunksize', '2')
+    assert 'needs two passes' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_streamed_dedupe_matches_in_memory(tmp_path, keep):
+    rng = np.random.default_rng(10)
+    data = pd.DataFrame({'k': rng.integers(0, 40, 300), 'j': rng.integers(0, 3, 300), 'v': np.arange(300)})
+    source = write_csv(tmp_path / 'in.csv', data)
+    memory, streamed = tmp_path / 'memory.csv', tmp_path / 'streamed.csv'
+    run_tool(source, 'dedupe', '--keys', 'k', 'j', '--keep', keep, '--output', memory, '--no-cache')
+    run_tool(source, 'dedupe', '--keys', 'k', 'j', '--keep', keep, '--output', streamed, '--chunksize', 32,
+             '--temp_dir', tmp_path)
+    assert memory.read_text() == streamed.read_text()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+
+
+def test_parse_expression_maps_backticked_columns():
+    target, _, columns = CSVTOOL.parse_expression('`net margin` = (`gross sales` - cost) / `gross sales`')
+    assert target == 'net margin'
+    assert set(columns.values()) == {'cost', 'gross sales'}
+
+
+@pytest.mark.parametrize('text', ['a + b', 'x == a', 'x = a +', 'x = a.b', 'x = f(a)', 'x = abs(a, key=1)',
+                                  'x = [a]', 'x = lambda: 1'])
+def test_parse_expression_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        CSVTOOL.parse_expression(text)
+
+
+def test_divide_policies():
+    left, right = np.array([1.0, -1.0, 0.0, 4.0]), np.array([0.0, 0.0, 0.0, 2.0])
+    with pytest.raises(ZeroDivisionError):
+        CSVTOOL._divide(np.true_divide, left, right, 'error')
+    result = CSVTOOL._divide(np.true_divide, left, right, 'nan')
+    assert np.isnan(result[:3]).all() and result[3] == 2.0
+    result = CSVTOOL._divide(np.true_divide, left, right, 'inf')
+    assert result[0] == np.inf and result[1] == -np.inf and np.isnan(result[2]) and result[3] == 2.0
+
+
+def test_evaluate_expression():
+    data = pd.DataFrame({'a': [1, 2, 3], 'b': [2.0, np.nan, 4.0]})
+    target, result = CSVTOOL.evaluate_expression(data, 'c = a * 2 + b if a > 1 else -a')
+    assert target == 'c'
+    np.testing.assert_array_equal(result.to_numpy(), [-1.0, np.nan, 10.0])
+    with pytest.raises(KeyError):
+        CSVTOOL.evaluate_expression(data, 'c = missing + 1')
+    with pytest.raises(ZeroDivisionError):
+        CSVTOOL.evaluate_expression(data, 'c = a / (a - 1)')
+
+
+def test_apply_expression_strict_raises_instead_of_skipping():
+    data = pd.DataFrame({'a': [1, 0]})
+    assert 'r' not in CSVTOOL.apply_expression(data.copy(), 'r = 1 / a').columns
+    with pytest.raises(ZeroDivisionError):
+        CSVTOOL.apply_expression(data.copy(), 'r = 1 / a', strict=True)
@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    data = pd.DataFrame({'id': [5, 3, 9, 3, 1, 7], 'name': ['e', 'c', 'i', 'c', 'a', 'g']})
+    return write_csv(tmp_path / 'indexed.csv', data)
+
+
+def test_sorted_index_lookup(indexed):
+    CSVTOOL.build_index(indexed, 'id')
+    index = CSVTOOL.load_index(indexed, 'id')
+    rows, offsets = CSVTOOL.index_lookup(index, value='3')
+    assert rows.tolist() == [1, 3]
+    assert CSVTOOL.read_rows_at(indexed, offsets)['name'].tolist() == ['c', 'c']
+    rows, _ = CSVTOOL.index_lookup(index, low='4', high='8')
+    assert rows.tolist() == [0, 5]
+    rows, _ = CSVTOOL.index_lookup(index, value='not a number')
+    assert len(rows) == 0
+
+
+def test_hash_index_lookup(indexed):
+    meta = CSVTOOL.build_index(indexed, 'name')
+    assert meta['kind'] == 'hash'
+    index = CSVTOOL.load_index(indexed, 'name')
+    rows, _ = CSVTOOL.index_lookup(index, value='c')
+    assert rows.tolist() == [1, 3]
+    assert CSVTOOL.index_lookup(index, low='a') is None
+
+
+def test_stale_index_is_removed(indexed, capsys):
+    CSVTOOL.build_index(indexed, 'id')
+    with open(indexed, 'a') as handle:
+        handle.write('3,z\n')
+    assert CSVTOOL.load_index(indexed, 'id') is None
+    assert 'out of date' in capsys.readouterr().out
+    assert not os.listdir(CSVTOOL.index_dir(indexed))
+
+
+def test_filter_with_stale_index_scans_and_writes_output(tmp_path, indexed):
+    run_tool(indexed, 'index', '--column', 'id')
+    with open(indexed, 'a') as handle:
+        handle.write('3,z\n')
+    output = tmp_path / 'out.csv'
+    run_tool(indexed, 'filter', '--column', 'id', '--value', '3', '--output', output, '--no-cache')
+    assert pd.read_csv(output)['name'].tolist() == ['c', 'c', 'z']
+
+
+@pytest.mark.parametrize('column, kind', [('name', 'hash'), ('score', 'sorted'), ('score', 'hash')])
+def test_index_built_in_chunks_matches_one_chunk(tmp_path, monkeypatch, column, kind):
+    rng = np.random.default_rng(10)
+    data = pd.DataFrame({'name': rng.choice(['ann', 'bob', 'cy', None], 200), 'score': rng.integers(0, 20, 200)})
+    # The first chunk has no values at all, so the key type is only known from a later chunk.
+    data.loc[:49, 'name'] = None
+    data.loc[:49, 'score'] = None
+    source = write_csv(tmp_path / 'in.csv', data)
+    monkeypatch.setattr(CSVTOOL, 'INDEX_CHUNK_ROWS', 50)
+    meta = CSVTOOL.build_index(source, column, kind)
+    assert meta['kind'] == kind and meta['entries'] == data[column].notna().sum()
+    index = CSVTOOL.load_index(source, column)
+    assert index['keys'].dtype == (np.uint64 if kind == 'hash' else np.float64)
+    value = data[column].dropna().iloc[0]
+    rows, _ = CSVTOOL.index_lookup(index, value=str(int(value) if column == 'score' else value))
+    assert rows.tolist() == np.flatnonzero(data[column] == value).tolist()
+
+
+def test_sorted_index_rejects_text(indexed):
+    with pytest.raises(ValueError, match='hash index'):
+        CSVTOOL.build_index(indexed, 'name', 'sorted')
@@ -0,0 +1,54 @@
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.csv.gz', 'out.parquet', 'out.feather'])
+def test_new_output_file_follows_umask(tmp_path, name):
+    umask = os.umask(0o022)
+    try:
+        CSVTOOL.save_data(pd.DataFrame({'a': [1, 2]}), str(tmp_path / name))
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(tmp_path / name).st_mode) == 0o644
+
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.csv.gz', 'out.parquet', 'out.feather'])
+def test_replaced_output_keeps_its_mode(tmp_path, name):
+    output = tmp_path / name
+    output.write_text('old\n')
+    os.chmod(output, 0o640)
+    CSVTOOL.save_data(pd.DataFrame({'a': [1, 2]}), str(output))
+    assert stat.S_IMODE(os.stat(output).st_mode) == 0o640
+    assert CSVTOOL.load_data(str(output))['a'].tolist() == [1, 2]
+
+
+def test_modify_keeps_the_file_mode(tmp_path):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': [1.0, None]}))
+    os.chmod(source, 0o640)
+    run_tool(source, 'clean', '--action', 'drop', '--modify', '--no-cache')
+    assert stat.S_IMODE(os.stat(source).st_mode) == 0o640
+    assert pd.read_csv(source)['a'].tolist() == [1.0]
+
+
+@pytest.mark.parametrize('name', ['out.csv.gz', 'out.parquet', 'out.feather'])
+@pytest.mark.parametrize('mode', [['--no-cache'], ['--chunksize', '2']])
+def test_saved_formats_load_back(tmp_path, name, mode):
+    data = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', None, 'z']})
+    source = write_csv(tmp_path / 'in.csv', data)
+    run_tool(source, 'save', '--output', tmp_path / name, *mode)
+    assert CSVTOOL.file_format(str(tmp_path / name)) == name[len('out.'):]
+    pd.testing.assert_frame_equal(CSVTOOL.load_data(str(tmp_path / name)), data, check_dtype=False)
+
+
+def test_zstd_without_the_module_saves_nothing(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(CSVTOOL, 'zstandard', None)
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': [1, 2]}))
+    run_tool(source, 'save', '--output', tmp_path / 'out.csv.zst', '--chunksize', '1')
+    assert 'zstandard is required' in capsys.readouterr().out
+    assert os.listdir(tmp_path) == ['in.csv']
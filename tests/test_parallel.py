@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def zero_division(tmp_path):
+    # The divide by zero sits in the last partition.
+    return write_csv(tmp_path / 'dz.csv', pd.DataFrame({'a': range(1, 11), 'b': [1] * 8 + [0, 1]}))
+
+
+@pytest.fixture
+def staff(tmp_path):
+    return write_csv(tmp_path / 'staff.csv', pd.DataFrame({
+        'Department': ['HR', 'Sales', 'HR', 'IT', 'Sales', 'IT', 'HR'] * 3,
+        'Salary': [50.0, None, 55.0, 80.0, 70.0, None, 65.0] * 3,
+        'Age': list(range(20, 41))}))
+
+
+@pytest.mark.parametrize('parts', [1, 2, 3, 7, 50])
+def test_byte_ranges_cover_the_rows_once(staff, parts):
+    ranges = CSVTOOL.split_byte_ranges(staff, parts)
+    raw = open(staff, 'rb').read()
+    assert ranges[0][0] == raw.index(b'\n') + 1
+    assert ranges[-1][1] == len(raw)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and raw[start - 1:start] == b'\n'
+    assert len(ranges) <= parts
+
+
+def test_partial_transform_failure_saves_nothing(tmp_path, zero_division, capsys):
+    output = tmp_path / 'out.csv'
+    run_tool(zero_division, 'transform', '--expr', 'r = a / b', '--output', output, '--workers', 2, '--chunksize', 3)
+    assert not output.exists()
+    assert 'Nothing was saved' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('operation', [
+    ['transform', '--expr', 'r = Salary / Age'],
+    ['filter', '--column', 'Department', '--value', 'HR'],
+    ['clean', '--action', 'fill', '--fill_value', 'mean'],
+    ['save'],
+])
+def test_parallel_output_matches_in_memory(tmp_path, staff, operation):
+    memory, parallel = tmp_path / 'memory.csv', tmp_path / 'parallel.csv'
+    run_tool(staff, *operation, '--output', memory, '--no-cache')
+    run_tool(staff, *operation, '--output', parallel, '--workers', 2, '--chunksize', 3)
+    pd.testing.assert_frame_equal(pd.read_csv(memory), pd.read_csv(parallel))
+
+
+@pytest.mark.parametrize('operation', [
+    ['summary'],
+    ['aggregate', '--groupby', 'Department', '--aggregation', 'mean'],
+])
+def test_parallel_statistics_match_streamed(staff, operation, capsys):
+    run_tool(staff, *operation, '--chunksize', 3)
+    streamed = capsys.readouterr().out
+    run_tool(staff, *operation, '--workers', 3, '--chunksize', 3)
+    assert capsys.readouterr().out == streamed
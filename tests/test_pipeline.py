@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def staff(tmp_path):
+    return write_csv(tmp_path / 'staff.csv', pd.DataFrame({
+        'Department': ['HR', 'Sales', 'HR', 'IT', 'Sales'],
+        'Salary': [50.0, 60.0, None, 80.0, 70.0],
+        'Age': [30, 40, 50, 20, 35]}))
+
+
+@pytest.mark.parametrize('mode', [[], ['--chunksize', '2']])
+@pytest.mark.parametrize('step', ['filter:column=Departmnt,value=HR', 'dedupe:column=Departmnt',
+                                  'transform:new_column=x,math_operation=add,columns=Age+Salry',
+                                  'transform:expr=x = Salry * 2', 'aggregate:groupby=Departmnt,aggregation=sum'])
+def test_misspelled_column_fails_before_saving(tmp_path, staff, mode, step, capsys):
+    output = tmp_path / 'out.csv'
+    run_tool(staff, 'pipeline', '--steps', step, f'save:output={output}', '--no-cache', *mode)
+    assert not output.exists()
+    assert "not found in dataset" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('mode', [[], ['--chunksize', '2']])
+def test_later_steps_see_transform_columns(tmp_path, staff, mode):
+    output = tmp_path / 'out.csv'
+    run_tool(staff, 'pipeline', '--steps', 'clean:action=drop', 'transform:expr=ratio = Salary / Age',
+             'filter:column=ratio,min_value=1.8', f'save:output={output}', '--no-cache', *mode)
+    assert pd.read_csv(output)['Department'].tolist() == ['IT', 'Sales']
+
+
+def test_invalid_expression_fails_the_pipeline(tmp_path, staff, capsys):
+    output = tmp_path / 'out.csv'
+    run_tool(staff, 'pipeline', '--steps', 'transform:expr=x = Salary /', f'save:output={output}', '--no-cache')
+    assert not output.exists()
+    assert 'Step 1 (transform): Invalid expression' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('mode', [[], ['--chunksize', '2']])
+def test_saved_summary_keeps_statistic_labels(tmp_path, staff, mode):
+    output = tmp_path / 'summary.csv'
+    run_tool(staff, 'pipeline', '--steps', 'summary', f'save:output={output}', '--no-cache', *mode)
+    saved = pd.read_csv(output, index_col='statistic')
+    assert saved.index.tolist() == ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    assert saved.loc['count', 'Salary'] == 4
+    assert saved.loc['max', 'Age'] == 50
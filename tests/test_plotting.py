@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(11)
+    x = np.arange(20000, dtype=float)
+    y = np.sin(x / 500) + rng.normal(0, 0.05, len(x))
+    y[12345] = 10.0
+    return x, y
+
+
+def test_lttb_keeps_the_ends_and_the_spike(signal):
+    x, y = signal
+    kept_x, kept_y = CSVTOOL.lttb(x, y, 400)
+    assert len(kept_x) == 400
+    assert kept_x[0] == x[0] and kept_x[-1] == x[-1]
+    assert (np.diff(kept_x) > 0).all()
+    assert 12345 in kept_x and kept_y.max() == 10.0
+
+
+def test_lttb_leaves_short_series_alone(signal):
+    x, y = signal
+    kept_x, kept_y = CSVTOOL.lttb(x[:100], y[:100], 400)
+    assert (kept_x == x[:100]).all() and (kept_y == y[:100]).all()
+
+
+def test_minmax_decimate_keeps_each_bucket_extremes(signal):
+    x, y = signal
+    kept_x, kept_y = CSVTOOL.minmax_decimate(x, y, 100)
+    assert len(kept_x) <= 200
+    assert kept_y.max() == y.max() and kept_y.min() == y.min()
+    buckets = ((x - x[0]) / (x[-1] - x[0]) * 99).astype(int)
+    for bucket in (0, 37, 99):
+        assert y[buckets == bucket].max() in kept_y and y[buckets == bucket].min() in kept_y
+
+
+def test_histogram_stats_merge_matches_one_pass():
+    rng = np.random.default_rng(12)
+    data = pd.DataFrame({'a': rng.normal(size=30000)})
+    data.loc[::17, 'a'] = np.nan
+    edges = CSVTOOL.histogram_edges(CSVTOOL.column_range([data], 'a'))
+    whole = CSVTOOL.HistogramStats('a', edges, sample_size=1000)
+    whole.update(data)
+    merged = CSVTOOL.HistogramStats('a', edges, sample_size=1000, seed=1)
+    for start in range(0, len(data), 7000):
+        part = CSVTOOL.HistogramStats('a', edges, sample_size=1000, seed=start)
+        part.update(data.iloc[start:start + 7000])
+        merged.merge(part)
+    values = data['a'].dropna().to_numpy()
+    assert (merged.counts == np.histogram(values, edges)[0]).all()
+    assert (merged.counts == whole.counts).all()
+    assert len(merged.sample) == 1000 and np.isin(merged.sample, values).all()
+    grid, density = merged.kde()
+    assert abs(density.sum() * (grid[1] - grid[0]) / (edges[1] - edges[0]) - len(values)) < 0.02 * len(values)
+
+
+def test_category_counts_fold_the_tail_into_other():
+    counts = CSVTOOL.CategoryCounts('c')
+    counts.update(pd.DataFrame({'c': list('aaaabbbccd')}))
+    other = CSVTOOL.CategoryCounts('c')
+    other.update(pd.DataFrame({'c': list('eeeef')}))
+    counts.merge(other)
+    assert counts.top(3).to_dict() == {'a': 4, 'e': 4, 'other': 7}
+
+
+def test_line_series_stays_within_its_budget(signal):
+    x, y = signal
+    series = CSVTOOL.LineSeries('y', budget=100)
+    for start in range(0, len(x), 1000):
+        series.update(pd.DataFrame({'y': y[start:start + 1000]}, index=x[start:start + 1000]))
+        assert len(series.x) <= 4 * 100 + 1000
+    kept_x, kept_y = series.points()
+    assert len(kept_x) == 100 and kept_y.max() == 10.0
+
+
+@pytest.mark.parametrize('visualization', ['hist', 'line', 'bar'])
+def test_streamed_plot_renders_headless(tmp_path, visualization):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': np.arange(5000) % 13}))
+    output = tmp_path / 'plot.png'
+    run_tool(source, 'visualize', '--column', 'a', '--visualization', visualization, '--plot_output', output,
+             '--chunksize', 1000)
+    assert output.read_bytes()[:4] == b'\x89PNG'
@@ -0,0 +1,84 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def profiler():
+    profiler = CSVTOOL.Profiler()
+    profiler.start()
+    return profiler
+
+
+def test_nested_stages_are_charged_exclusively(profiler):
+    with profiler.stage('filter'):
+        time.sleep(0.05)
+        with profiler.stage('load'):
+            time.sleep(0.1)
+        with profiler.stage('save'):
+            time.sleep(0.02)
+    profiler.stop()
+    wall = {record['stage']: record['wall_s'] for record in profiler.report('filter')}
+    assert list(wall) == ['load', 'filter', 'save']
+    assert 0.1 <= wall['load'] < 0.2
+    assert 0.05 <= wall['filter'] < 0.15
+    assert 0.02 <= wall['save'] < 0.1
+
+
+def test_iterate_charges_the_producer_and_counts_rows(profiler):
+    def chunks():
+        for _ in range(3):
+            time.sleep(0.03)
+            yield pd.DataFrame({'a': range(10)})
+    with profiler.stage('transform'):
+        for _ in profiler.iterate('load', chunks()):
+            time.sleep(0.01)
+    profiler.stop()
+    records = {record['stage']: record for record in profiler.report('transform')}
+    assert records['load']['rows'] == 30
+    assert 0.09 <= records['load']['wall_s'] < 0.19
+    assert 0.03 <= records['transform']['wall_s'] < 0.12
+    assert records['load']['rows_per_s'] == pytest.approx(30 / records['load']['wall_s'])
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = CSVTOOL.Profiler()
+    chunks = [pd.DataFrame({'a': [1]})]
+    with profiler.stage('load') as record:
+        assert record == {}
+    assert profiler.iterate('load', chunks) is chunks
+    profiler.add_rows('load', 5)
+    assert profiler.stages == {}
+
+
+@pytest.mark.parametrize('mode', [['--no-cache'], ['--chunksize', '40']])
+def test_profile_json_reports_each_stage(tmp_path, mode):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': range(100), 'b': range(1, 101)}))
+    report = tmp_path / 'profile.jsonl'
+    for _ in range(2):
+        run_tool(source, 'transform', '--expr', 'r = a / b', '--output', tmp_path / 'out.csv', '--profile', 'json',
+                 '--profile_output', report, *mode)
+    lines = [json.loads(line) for line in report.read_text().splitlines()]
+    assert len(lines) == 2
+    stages = {record['stage']: record for record in lines[-1]['stages']}
+    assert list(stages) == ['load', 'transform', 'save']
+    assert stages['load']['rows'] == 100 and lines[-1]['total']['rows'] == 100
+    assert lines[-1]['operation'] == 'transform'
+    total = lines[-1]['total']['wall_s']
+    assert sum(record['wall_s'] for record in stages.values()) <= total
+
+
+def test_cached_filter_reports_its_load(tmp_path):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': range(100), 'b': ['x', 'y'] * 50}))
+    report = tmp_path / 'profile.jsonl'
+    run_tool(source, 'summary')
+    run_tool(source, 'filter', '--column', 'b', '--value', 'x', '--output', tmp_path / 'out.csv', '--profile', 'json',
+             '--profile_output', report)
+    stages = {record['stage']: record for record in json.loads(report.read_text())['stages']}
+    assert stages['load']['rows'] == 100
+    assert stages['filter']['rows'] == 100
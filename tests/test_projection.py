@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+COLUMNS = ['id', 'name', 'dept', 'salary', 'age']
+
+
+def plan(*argv):
+    return CSVTOOL.plan_columns(CSVTOOL.build_parser().parse_args(['data.csv', *argv]), COLUMNS)
+
+
+@pytest.fixture
+def wide(tmp_path):
+    return write_csv(tmp_path / 'wide.csv', pd.DataFrame({
+        'id': range(6), 'name': list('abcdef'), 'dept': ['HR', 'IT', 'HR', 'IT', 'HR', 'Sales'],
+        'salary': [50.0, 60.0, 55.0, 80.0, None, 70.0], 'age': [30, 40, 50, 20, 35, 45]}))
+
+
+@pytest.mark.parametrize('argv, expected', [
+    (['visualize', '--column', 'salary'], ['salary']),
+    (['index', '--column', 'dept'], ['dept']),
+    (['filter', '--column', 'dept', '--value', 'HR', '--select', 'name'], ['name', 'dept']),
+    (['sort', '--sort_by', 'age', 'id', '--select', 'name'], ['id', 'name', 'age']),
+    (['dedupe', '--keys', 'dept', '--select', 'id'], ['id', 'dept']),
+    (['transform', '--expr', 'r = salary / age', '--select', 'id'], ['id', 'salary', 'age']),
+    (['transform', '--new_column', 'r', '--math_operation', 'add', '--columns', 'salary', 'age', '--select', 'name'],
+     ['name', 'salary', 'age']),
+    (['aggregate', '--groupby', 'dept', '--aggregation', 'sum', '--select', 'salary'], ['dept', 'salary']),
+])
+def test_plan_columns_reads_what_the_operation_needs(argv, expected):
+    assert plan(*argv) == expected
+
+
+@pytest.mark.parametrize('argv', [['filter', '--column', 'dept', '--value', 'HR'], ['summary'], ['sort', '--column', 'age']])
+def test_plan_columns_without_select_reads_everything(argv):
+    assert plan(*argv) is None
+
+
+def test_project_drops_key_columns_but_keeps_the_transform_target():
+    data = pd.DataFrame({column: [1] for column in COLUMNS + ['r']})
+    args = CSVTOOL.build_parser().parse_args(['data.csv', 'transform', '--expr', 'r = salary / age', '--select', 'id'])
+    assert list(CSVTOOL.project(data, args).columns) == ['id', 'r']
+    args = CSVTOOL.build_parser().parse_args(['data.csv', 'filter', '--column', 'dept', '--value', 'HR'])
+    assert CSVTOOL.project(data, args) is data
+
+
+@pytest.mark.parametrize('mode', [['--no-cache'], ['--chunksize', '2']])
+def test_filter_with_select_reads_and_writes_only_those_columns(tmp_path, wide, mode, monkeypatch):
+    read_csv, used = pd.read_csv, []
+
+    def spy(*args, **kwargs):
+        used.append(kwargs.get('usecols'))
+        return read_csv(*args, **kwargs)
+    monkeypatch.setattr(CSVTOOL.pd, 'read_csv', spy)
+    output = tmp_path / 'out.csv'
+    run_tool(wide, 'filter', '--column', 'dept', '--value', 'HR', '--select', 'name', '--output', output, *mode)
+    assert ['name', 'dept'] in used
+    result = pd.read_csv(output)
+    assert list(result.columns) == ['name']
+    assert result['name'].tolist() == ['a', 'c', 'e']
+
+
+def test_unknown_select_column_is_an_error(wide, capsys):
+    run_tool(wide, 'summary', '--select', 'salry')
+    assert "Columns ['salry'] not found in dataset." in capsys.readouterr().out
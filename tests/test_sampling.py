@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+def test_block_sample_count_margin_covers_estimated_row_count(tmp_path):
+    rng = np.random.default_rng(9)
+    # Line lengths vary, so the row count has to be estimated.
+    data = pd.DataFrame({'a': rng.integers(0, 10 ** rng.integers(1, 8, 50000)), 'b': rng.normal(size=50000)})
+    source = write_csv(tmp_path / 'in.csv', data)
+    sample, population, exact, error = CSVTOOL.block_sample(source, 2000, seed=1)
+    assert not exact and error > 0
+    described = CSVTOOL.sampled_describe(sample, population, error)
+    margin = described.loc['count ±', 'a']
+    assert margin > 0
+    assert abs(described.loc['count', 'a'] - len(data)) <= margin
+
+
+def test_reservoir_sample_counts_rows_exactly(tmp_path):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': range(5000)}))
+    sample, population, exact, error = CSVTOOL.reservoir_sample(source, 100, seed=1)
+    assert (population, exact, error) == (5000, True, 0.0)
+    assert (sample['a'].to_numpy() == sample.index.to_numpy()).all()
+
+
+@pytest.mark.parametrize('method', ['block', 'reservoir'])
+def test_sampled_summary_reports_its_sample(tmp_path, method, capsys):
+    source = write_csv(tmp_path / 'in.csv', pd.DataFrame({'a': range(5000)}))
+    run_tool(source, 'summary', '--sample', 500, '--sample_method', method, '--seed', 1)
+    output = capsys.readouterr().out
+    assert 'mean ±' in output
+    assert 'Approximate:' in output and 'sample' in output
+    run_tool(source, 'summary', '--sample', 500, '--sample_method', method, '--seed', 1)
+    assert capsys.readouterr().out == output
+
+
+# Sketches
+
+def test_hyperloglog_estimate_and_merge():
+    rng = np.random.default_rng(6)
+    hashes = rng.integers(0, 2 ** 64, 200000, dtype=np.uint64)
+    left, right = CSVTOOL.HyperLogLog(), CSVTOOL.HyperLogLog()
+    left.add(hashes[:120000])
+    right.add(hashes[80000:])
+    left.merge(right)
+    assert abs(left.estimate() / 200000 - 1) < 4 * left.relative_error()
+    small = CSVTOOL.HyperLogLog()
+    small.add(hashes[:100])
+    assert abs(small.estimate() - 100) < 3
+
+
+def test_count_min_sketch_never_underestimates():
+    rng = np.random.default_rng(7)
+    keys = rng.integers(0, 2 ** 64, 5000, dtype=np.uint64)
+    counts = rng.integers(1, 50, 5000)
+    left, right = CSVTOOL.CountMinSketch(width=512), CSVTOOL.CountMinSketch(width=512)
+    left.add(keys[:2500], counts[:2500])
+    right.add(keys[2500:], counts[2500:])
+    left.merge(right)
+    estimates = left.query(keys)
+    assert left.total == counts.sum()
+    assert (estimates >= counts).all()
+    assert np.mean(estimates - counts <= left.error()) > 0.95
+
+
+def test_quantile_sketch_exact_then_approximate():
+    rng = np.random.default_rng(8)
+    values = rng.lognormal(size=50000)
+    sketch = CSVTOOL.QuantileSketch(capacity=200)
+    sketch.update(values[:300])
+    assert sketch.exact
+    assert sketch.quantile(0.5) == np.quantile(values[:300], 0.5)
+    other = CSVTOOL.QuantileSketch(capacity=200)
+    for start in range(300, len(values), 5000):
+        other.update(values[start:start + 5000])
+    sketch.merge(other)
+    assert not sketch.exact
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        rank = np.mean(values <= sketch.quantile(q))
+        assert abs(rank - q) < 0.01
@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def mixed(tmp_path):
+    return write_csv(tmp_path / 'mixed.csv', pd.DataFrame({
+        'small': [1, 2, None, 4] * 25,
+        'wide': [1000, -2000, 3000, 4000] * 25,
+        'short': ['1.5', '2.25', '-0.125', '1e3'] * 25,
+        'long': [0.1, 1 / 3, 2.5, 3.0] * 25,
+        'dirty': ['1', '2', '3', '4'] * 24 + ['oops', '5', '6', '7'],
+        'when': ['2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01'] * 25,
+        'kind': ['a', 'b', 'a', 'c'] * 25}))
+
+
+def test_infer_schema_picks_compact_dtypes(mixed):
+    schema = CSVTOOL.infer_schema(mixed)
+    assert schema['dtype'] == {'small': 'Int8', 'wide': 'Int32', 'short': 'float32', 'long': 'float64',
+                               'dirty': 'Int8', 'kind': 'category'}
+    assert schema['parse_dates'] == ['when']
+    assert schema['na_values'] == {'dirty': ['oops']}
+    data = CSVTOOL.load_data(mixed, schema=schema)
+    assert str(data['small'].dtype) == 'Int8' and data['small'].isna().sum() == 25
+    assert data['dirty'].isna().sum() == 1
+    assert pd.api.types.is_datetime64_any_dtype(data['when'])
+
+
+def test_values_beyond_the_sample_keep_full_width(tmp_path):
+    source = write_csv(tmp_path / 'grow.csv', pd.DataFrame({'id': list(range(10)) + [100000], 'x': [0.5] * 10 + [1e300]}))
+    schema = CSVTOOL.infer_schema(source, sample_rows=5)
+    assert schema['dtype'] == {'id': 'Int8', 'x': 'float32'}
+    loaded = CSVTOOL.load_data(source, schema=schema)
+    streamed = pd.concat(CSVTOOL.load_chunks(source, 5, schema))
+    for data in (loaded, streamed):
+        assert data['id'].iloc[-1] == 100000
+        assert data['x'].iloc[-1] == 1e300
+    # Chunks that do fit are still narrowed.
+    assert str(next(CSVTOOL.load_chunks(source, 5, schema))['id'].dtype) == 'Int8'
+
+
+def test_text_beyond_the_sample_falls_back_to_default_dtypes(tmp_path, capsys):
+    source = write_csv(tmp_path / 'late.csv', pd.DataFrame({'id': [str(i) for i in range(10)] + ['oops']}))
+    schema = CSVTOOL.infer_schema(source, sample_rows=5)
+    data = CSVTOOL.load_data(source, schema=schema)
+    assert 'schema did not fit the whole file' in capsys.readouterr().out
+    assert data['id'].iloc[-1] == 'oops'
+
+
+def test_schema_file_is_saved_then_reused(tmp_path, mixed, monkeypatch, capsys):
+    schema_file = tmp_path / 'schema.json'
+    run_tool(mixed, 'summary', '--schema', schema_file, '--no-cache')
+    assert 'Schema saved' in capsys.readouterr().out
+    saved = json.loads(schema_file.read_text())
+    assert saved['dtype']['small'] == 'Int8'
+
+    # Edited by hand: the saved file wins over inference from now on.
+    saved['dtype']['wide'] = 'float64'
+    schema_file.write_text(json.dumps(saved))
+    monkeypatch.setattr(CSVTOOL, 'infer_schema', lambda *args, **kwargs: pytest.fail("inferred again"))
+    output = tmp_path / 'out.parquet'
+    run_tool(mixed, 'save', '--output', output, '--schema', schema_file, '--no-cache')
+    assert pd.read_parquet(output)['wide'].dtype == np.float64
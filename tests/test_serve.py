@@ -0,0 +1,125 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import write_csv
+
+TOKEN = 'correct-horse-battery-staple'
+
+
+@pytest.fixture
+def files(tmp_path):
+    return [write_csv(tmp_path / f'{name}.csv', pd.DataFrame({'a': range(1000), 'b': ['x' * 20] * 1000}))
+            for name in ('one', 'two', 'three')]
+
+
+def loaded(registry):
+    return [os.path.basename(path) for path, _ in registry.entries]
+
+
+def test_registry_evicts_the_least_recently_used(files):
+    registry = CSVTOOL.DatasetRegistry(max_datasets=2)
+    registry.get(files[0])
+    registry.get(files[1])
+    registry.get(files[0])
+    registry.get(files[2])
+    assert loaded(registry) == ['one.csv', 'three.csv']
+
+
+def test_registry_keeps_within_its_memory_limit(files):
+    registry = CSVTOOL.DatasetRegistry()
+    registry.get(files[0])
+    # Room for two of the equally sized frames.
+    registry.memory_limit = int(next(iter(registry.entries.values()))['bytes'] * 2.5)
+    for file_path in files[1:]:
+        registry.get(file_path)
+    assert loaded(registry) == ['two.csv', 'three.csv']
+    registry.memory_limit = 0
+    registry.get(files[0])
+    # The dataset just requested always stays.
+    assert loaded(registry) == ['one.csv']
+
+
+def test_registry_reloads_a_changed_file(files):
+    registry = CSVTOOL.DatasetRegistry()
+    first = registry.get(files[0])
+    assert registry.get(files[0]) is not first
+    assert next(iter(registry.entries.values()))['hits'] == 1
+    stat = os.stat(files[0])
+    pd.DataFrame({'a': [7], 'b': ['y']}).to_csv(files[0], index=False)
+    os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert registry.get(files[0])['a'].tolist() == [7]
+    assert next(iter(registry.entries.values()))['hits'] == 0
+
+
+def test_registry_hands_out_frames_that_can_be_changed(files):
+    registry = CSVTOOL.DatasetRegistry()
+    data = registry.get(files[0])
+    data['c'] = 1
+    assert 'c' not in registry.get(files[0]).columns
+    assert list(registry.get(files[0], schema={'usecols': ['b']}).columns) == ['b']
+
+
+def test_serve_token_from_the_environment(monkeypatch, capsys):
+    monkeypatch.delenv(CSVTOOL.SERVE_TOKEN_ENV, raising=False)
+    assert CSVTOOL.read_serve_token() is None
+    assert 'needs a token' in capsys.readouterr().out
+    monkeypatch.setenv(CSVTOOL.SERVE_TOKEN_ENV, 'short')
+    assert CSVTOOL.read_serve_token() is None
+    assert 'at least 16 characters' in capsys.readouterr().out
+    monkeypatch.setenv(CSVTOOL.SERVE_TOKEN_ENV, f' {TOKEN}\n')
+    assert CSVTOOL.read_serve_token() == TOKEN
+
+
+def test_serve_token_file_must_be_private(tmp_path, capsys):
+    token_file = tmp_path / 'token'
+    token_file.write_text(TOKEN + '\n')
+    os.chmod(token_file, 0o644)
+    assert CSVTOOL.read_serve_token(str(token_file)) is None
+    assert 'chmod 600' in capsys.readouterr().out
+    os.chmod(token_file, 0o600)
+    assert CSVTOOL.read_serve_token(str(token_file)) == TOKEN
+
+
+def test_port_without_a_token_does_not_listen(monkeypatch, capsys):
+    monkeypatch.delenv(CSVTOOL.SERVE_TOKEN_ENV, raising=False)
+    monkeypatch.setattr(CSVTOOL, 'serve_socket', lambda *args: pytest.fail('server started'))
+    CSVTOOL.main(['serve', '--port', '0'])
+    assert 'needs a token' in capsys.readouterr().out
+
+
+@pytest.fixture
+def server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), CSVTOOL._ServeHandler)
+    server.daemon_threads = True
+    server.session = CSVTOOL.ServeSession(CSVTOOL.DatasetRegistry())
+    server.token = TOKEN
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def exchange(address, lines):
+    with socket.create_connection(address, timeout=5) as connection:
+        connection.sendall(''.join(line + '\n' for line in lines).encode())
+        connection.shutdown(socket.SHUT_WR)
+        replies = connection.makefile().read().splitlines()
+    return [json.loads(reply) for reply in replies]
+
+
+def test_tcp_requests_need_the_token(server, files):
+    replies = exchange(server, [TOKEN, f'{files[0]} summary', 'quit'])
+    assert [reply['command'] for reply in replies] == ['auth', files[0], 'quit']
+    assert replies[0]['ok'] and replies[1]['ok'] and 'Summary Statistics' in replies[1]['output']
+    replies = exchange(server, ['wrong-token-wrong-token', f'{files[0]} summary'])
+    assert replies == [{'command': 'auth', 'ok': False, 'output': 'Error: invalid token\n', 'seconds': 0.0}]
+    replies = exchange(server, [f'{files[0]} summary'])
+    assert len(replies) == 1 and not replies[0]['ok']
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def ties(tmp_path):
+    # Few distinct keys, so almost every row ties with others; 'row' records the input order.
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({'key': rng.integers(0, 5, 500).astype(float), 'row': np.arange(500)})
+    data.loc[::37, 'key'] = np.nan
+    return write_csv(tmp_path / 'ties.csv', data)
+
+
+# Streamed sort against the in-memory result
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_streamed_sort_keeps_in_memory_tie_order(tmp_path, ties, order):
+    memory, streamed = tmp_path / 'memory.csv', tmp_path / 'streamed.csv'
+    run_tool(ties, 'sort', '--column', 'key', '--order', order, '--output', memory, '--no-cache')
+    run_tool(ties, 'sort', '--column', 'key', '--order', order, '--output', streamed, '--chunksize', 64,
+             '--temp_dir', tmp_path)
+    assert memory.read_text() == streamed.read_text()
+    result = pd.read_csv(memory)
+    # Missing keys sort last in both directions.
+    assert result['key'].isna().to_numpy()[result['key'].notna().sum():].all()
+    for _, group in result.groupby('key'):
+        assert group['row'].is_monotonic_increasing
+
+
+# External sort
+
+def test_external_sort_merges_many_runs(tmp_path):
+    rng = np.random.default_rng(2)
+    data = pd.DataFrame({'a': rng.integers(0, 50, 5000), 'b': rng.normal(size=5000), 'row': np.arange(5000)})
+    data.loc[::11, 'b'] = np.nan
+    chunks = [data.iloc[start:start + 300].copy() for start in range(0, len(data), 300)]
+    # fan_in=4 forces intermediate merge generations.
+    result = pd.concat(CSVTOOL.external_sort(iter(chunks), ['a', 'b'], [True, False], str(tmp_path), 300, fan_in=4))
+    expected = data.sort_values(['a', 'b'], ascending=[True, False], kind='stable', na_position='last')
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_merge_runs_is_stable_across_runs(tmp_path):
+    runs = []
+    for i, rows in enumerate([[0, 2, 4], [1, 3, 5]]):
+        frame = pd.DataFrame({'k': [1, 1, 1], CSVTOOL.SORT_ROW: rows})
+        run_file = str(tmp_path / f'run-{i}.pkl')
+        CSVTOOL.write_run([frame], run_file)
+        runs.append(run_file)
+    merged = pd.concat(CSVTOOL.merge_runs(runs, ['k'], [True], 2))
+    assert merged[CSVTOOL.SORT_ROW].tolist() == [0, 1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize('mode', [['--no-cache'], ['--chunksize', '64']])
+def test_multi_column_sort_and_top(tmp_path, ties, mode):
+    expected = pd.read_csv(ties).sort_values(['key', 'row'], ascending=[False, False], kind='stable',
+                                              na_position='last')
+    output, top = tmp_path / 'out.csv', tmp_path / 'top.csv'
+    run_tool(ties, 'sort', '--sort_by', 'key', 'row', '--order', 'desc', '--output', output, *mode)
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected.reset_index(drop=True))
+    run_tool(ties, 'sort', '--sort_by', 'key', 'row', '--order', 'desc', '--top', 10, '--output', top, *mode)
+    pd.testing.assert_frame_equal(pd.read_csv(top), expected.head(10).reset_index(drop=True))
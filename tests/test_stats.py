@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import CSVTOOL
+
+
+@pytest.fixture
+def numbers():
+    rng = np.random.default_rng(5)
+    data = pd.DataFrame({'g': rng.choice(['x', 'y', 'z'], 1000), 'a': rng.normal(10, 3, 1000),
+                         'b': rng.integers(0, 100, 1000).astype(float)})
+    data.loc[::13, 'a'] = np.nan
+    # A group that only appears in one part.
+    data.loc[990:, 'g'] = 'w'
+    return data
+
+
+def test_data_stats_merge_matches_describe(numbers):
+    numeric = numbers[['a', 'b']]
+    parts = [CSVTOOL.DataStats().update(numeric.iloc[start:start + 100]) for start in range(0, 1000, 100)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    result, expected = merged.describe(), numeric.describe()
+    for row in ('count', 'mean', 'std', 'min', 'max'):
+        np.testing.assert_allclose(result.loc[row], expected.loc[row])
+    # Under capacity the quantile sketch is still exact.
+    np.testing.assert_allclose(result.loc['50%'], expected.loc['50%'])
+
+
+def test_data_stats_describes_datetimes():
+    dates = pd.Series(pd.to_datetime(['2020-01-01', None, '2020-01-03', '2020-01-05']))
+    data = pd.DataFrame({'a': [1.0, 2.0, 3.0, 4.0], 't': dates})
+    stats = CSVTOOL.DataStats().update(data.iloc[:2]).merge(CSVTOOL.DataStats().update(data.iloc[2:]))
+    result, expected = stats.describe(), data.describe()
+    for row in ('count', 'mean', 'min', '50%', 'max'):
+        assert result.loc[row, 't'] == expected.loc[row, 't']
+    assert 't' not in stats.means()
+    assert stats.note() is None
+
+
+def test_data_stats_notes_approximate_quartiles():
+    stats = CSVTOOL.DataStats(quantile_capacity=50).update(pd.DataFrame({'a': np.arange(1000.0)}))
+    assert '25%/50%/75%' in stats.note()
+
+
+def test_data_stats_means_skip_empty_columns():
+    stats = CSVTOOL.DataStats().update(pd.DataFrame({'a': [1.0, 3.0], 'b': [np.nan, np.nan]}))
+    assert stats.means()['a'] == 2.0
+    assert np.isnan(stats.means()['b'])
+
+
+@pytest.mark.parametrize('aggregation', ['mean', 'sum', 'count', 'min', 'max', 'std'])
+def test_group_stats_merge_matches_groupby(numbers, aggregation):
+    left = CSVTOOL.GroupStats('g').update(numbers.iloc[:500])
+    right = CSVTOOL.GroupStats('g').update(numbers.iloc[500:])
+    result = left.merge(right).result(aggregation)
+    expected = numbers.groupby('g').agg(aggregation)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
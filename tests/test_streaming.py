@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from helpers import run_tool, write_csv
+
+
+@pytest.fixture
+def zero_division(tmp_path):
+    # The divide by zero sits in the last chunk when streaming three rows at a time.
+    return write_csv(tmp_path / 'dz.csv', pd.DataFrame({'a': range(1, 11), 'b': [1] * 8 + [0, 1]}))
+
+
+@pytest.fixture
+def staff(tmp_path):
+    return write_csv(tmp_path / 'staff.csv', pd.DataFrame({
+        'Department': ['HR', 'Sales', 'HR', 'IT', 'Sales', 'IT', 'HR'],
+        'Salary': [50.0, None, 55.0, 80.0, 70.0, None, 65.0],
+        'Age': [30, 40, 50, 20, 35, 45, 25]}))
+
+
+def test_partial_transform_failure_saves_nothing(tmp_path, zero_division, capsys):
+    output = tmp_path / 'out.csv'
+    run_tool(zero_division, 'transform', '--expr', 'r = a / b', '--output', output, '--chunksize', 3)
+    assert not output.exists()
+    assert 'Nothing was saved' in capsys.readouterr().out
+
+
+def test_partial_transform_failure_keeps_the_existing_output(tmp_path, zero_division):
+    output = tmp_path / 'out.csv'
+    output.write_text('previous,result\n1,2\n')
+    run_tool(zero_division, 'transform', '--new_column', 'r', '--math_operation', 'divide',
+             '--columns', 'a', 'b', '--output', output, '--chunksize', 3)
+    assert output.read_text() == 'previous,result\n1,2\n'
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == '.tmp'] == []
+
+
+@pytest.mark.parametrize('operation', [
+    ['transform', '--expr', 'r = Salary / Age'],
+    ['filter', '--column', 'Department', '--value', 'HR'],
+    ['filter', '--column', 'Age', '--min_value', '30', '--max_value', '45'],
+    ['clean', '--action', 'fill', '--fill_value', 'mean'],
+    ['clean', '--action', 'drop'],
+    ['save'],
+])
+def test_streamed_output_matches_in_memory(tmp_path, staff, operation):
+    memory, streamed = tmp_path / 'memory.csv', tmp_path / 'streamed.csv'
+    run_tool(staff, *operation, '--output', memory, '--no-cache')
+    run_tool(staff, *operation, '--output', streamed, '--chunksize', 3)
+    pd.testing.assert_frame_equal(pd.read_csv(memory), pd.read_csv(streamed))
+
+
+def test_streamed_clean_can_modify_its_own_input(staff):
+    run_tool(staff, 'clean', '--action', 'drop', '--modify', '--chunksize', 2)
+    assert pd.read_csv(staff)['Salary'].notna().all()
+    assert len(pd.read_csv(staff)) == 5